@@ -1,10 +1,13 @@
-from apistar import App, Include
+from apistar import App, ASyncApp, Include
 
 from idunn.utils.settings import SettingsComponent
 from idunn.utils.index_names import IndexNamesSettingsComponent
 from idunn.utils.es_wrapper import ElasticSearchComponent
 from idunn.utils.logging import init_logging, LogErrorHook
 from idunn.utils.cors import CORSHeaders
+from idunn.utils.compression import CompressionHook
+from idunn.utils.deadline import DeadlineComponent, DeadlineHook
+from idunn.utils.timezone_index import TimezoneFinder
 from idunn.api.urls import get_api_urls
 from apistar_prometheus import PrometheusComponent, PrometheusHooks
 
@@ -12,6 +15,8 @@ settings = SettingsComponent('IDUNN')
 
 init_logging(settings)
 
+TimezoneFinder.load()
+
 routes = [
     Include('/v1', name='v1', routes=get_api_urls(settings)),
 ]
@@ -20,13 +25,19 @@ components = [
     settings,
     ElasticSearchComponent(),
     IndexNamesSettingsComponent(),
+    DeadlineComponent(),
     PrometheusComponent()
 ]
 
-event_hooks = [LogErrorHook(), CORSHeaders, PrometheusHooks()]
+event_hooks = [LogErrorHook(), CORSHeaders, PrometheusHooks(), CompressionHook()]
+if not settings['ASYNC_APP']:
+    event_hooks.append(DeadlineHook())
+
 
+# The async app needs an ASGI server (eg. uvicorn)
+app_class = ASyncApp if settings['ASYNC_APP'] else App
 
-app = App(
+app = app_class(
     routes=routes,
     schema_url='/schema',
     components=components,
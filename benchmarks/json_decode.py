@@ -0,0 +1,54 @@
+"""
+    Microbenchmark of the decoding of the mimir documents
+    by the available JSON backends
+
+    Usage (from the root of the repository):
+        python -m benchmarks.json_decode [nb_iterations]
+"""
+import os
+import sys
+import json
+import timeit
+
+from idunn.utils.json_codec import ElasticsearchSerializer, get_available_backends
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), '..', 'tests', 'fixtures')
+
+DOCUMENTS = [
+    # (name, fixture, index, type)
+    ('poi', 'orsay_museum.json', 'munin_poi', 'poi'),
+    ('admin', 'admin_goujounac.json', 'munin_admin', 'admin'),
+]
+
+
+def build_es_response(fixture, index, doc_type):
+    """
+    Returns the raw response of ES to a GET of the document
+    """
+    with open(os.path.join(FIXTURES_DIR, fixture)) as f:
+        source = json.load(f)
+    return json.dumps({
+        '_index': index,
+        '_type': doc_type,
+        '_id': source['id'],
+        '_version': 1,
+        'found': True,
+        '_source': source
+    }, ensure_ascii=False)
+
+
+def run(number):
+    backends = get_available_backends()
+    print(f'{"document":10} {"size":>8} ' + ' '.join(f'{b.name:>12}' for b in backends))
+    for name, fixture, index, doc_type in DOCUMENTS:
+        raw = build_es_response(fixture, index, doc_type)
+        durations = []
+        for backend in backends:
+            serializer = ElasticsearchSerializer(backend)
+            duration = min(timeit.repeat(lambda: serializer.loads(raw), number=number, repeat=3))
+            durations.append(duration / number * 1e6)
+        print(f'{name:10} {len(raw):>8} ' + ' '.join(f'{d:>10.1f}us' for d in durations))
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
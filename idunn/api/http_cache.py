@@ -0,0 +1,121 @@
+"""
+    The places are returned with an ETag and a Cache-Control header,
+    so that they can be reused by the CDN and the browsers.
+
+    The ETag of a place is derived from the version of its ES document,
+    from the parameters of the request and from the next transitions of
+    its opening hours: it changes with the open/closed status, and never
+    expires by itself. Cache-Control (max-age) tells how long the place
+    is fresh: until its next transition, and not longer than the wiki
+    cache keeps its extract. The ETag is weak, since the place holds a
+    countdown to its next transition and its wiki extract is not part of
+    the digest.
+"""
+import hashlib
+from apistar import http
+
+
+IF_NONE_MATCH_HEADER = 'if-none-match'
+
+
+def get_source_version(es_place) -> str:
+    """
+    Returns the version of the ES document: its concrete index
+    (renewed by each reindexation) and its version in this index
+    """
+    return '{}/{}'.format(es_place.get('_index'), es_place.get('_version'))
+
+
+def get_digest(source_version, cache_key, transitions=()) -> str:
+    """
+    >>> get_digest('munin_poi_20181001/1', ('osm:node:1', None, 'fr', 'long'))
+    'ba351f255b3a02af4f72'
+    >>> get_digest('munin_poi_20181001/1', ('osm:node:1', None, 'fr', 'long'), ('2018-06-14T22:00:00+03:00',))
+    'a3890df8dae4c7916552'
+    """
+    value = (source_version,) + tuple(cache_key)
+    if transitions:
+        value += (transitions,)
+    return hashlib.sha1(repr(value).encode('utf-8')).hexdigest()[:20]
+
+
+def get_place_digest(place, source_version, cache_key) -> str:
+    """
+    Returns the digest of the place: the version of its document, the
+    parameters of the request and the next transitions of its opening hours
+    """
+    transitions = tuple(
+        block['next_transition_datetime'] for block in iter_blocks(place.blocks)
+        if block.get('next_transition_datetime')
+    )
+    return get_digest(source_version, cache_key, transitions)
+
+
+def make_etag(digest) -> str:
+    """
+    >>> make_etag('ba351f255b3a02af4f72')
+    'W/"ba351f255b3a02af4f72"'
+    """
+    return f'W/"{digest}"'
+
+
+def parse_etags(header_value) -> list:
+    """
+    Returns the digests of the ETags of an If-None-Match header
+
+    >>> parse_etags('W/"ba351f255b3a02af4f72", "other", *')
+    ['ba351f255b3a02af4f72', 'other']
+    """
+    etags = []
+    for value in header_value.split(','):
+        value = value.strip()
+        if value.startswith('W/'):
+            value = value[2:]
+        if len(value) > 2 and value[0] == value[-1] == '"':
+            etags.append(value[1:-1])
+    return etags
+
+
+def is_etag_valid(headers: http.Headers, digest) -> bool:
+    """
+    Returns True if the client sent the ETag of the digest
+    """
+    header_value = headers.get(IF_NONE_MATCH_HEADER)
+    if not header_value:
+        return False
+    return digest in parse_etags(header_value)
+
+
+def iter_blocks(blocks):
+    for block in blocks:
+        yield block
+        yield from iter_blocks(block.get('blocks') or [])
+
+
+def get_max_age(place, settings) -> int:
+    """
+    Returns how long (in seconds) the place can be reused by the clients:
+    until the next transition of its opening hours, and not longer than
+    the wiki cache keeps its extract. A partial place is not reused.
+    """
+    max_age = place.get_cache_ttl(int(settings['HTTP_CACHE_MAX_AGE']))
+    if any(block.get('type') == 'wikipedia' for block in iter_blocks(place.blocks)):
+        max_age = min(max_age, int(settings['WIKI_CACHE_TIMEOUT']))
+    return max(int(max_age), 0)
+
+
+def get_place_headers(place, digest, settings) -> dict:
+    max_age = get_max_age(place, settings)
+    if max_age <= 0:
+        return {'Cache-Control': 'no-cache'}
+    return {
+        'ETag': make_etag(digest),
+        'Cache-Control': f'public, max-age={max_age}',
+    }
+
+
+def not_modified(place, digest, settings) -> http.Response:
+    """
+    Response to a request whose ETag is still valid: the place is not sent again
+    """
+    return http.Response(b'', status_code=304, headers=get_place_headers(place, digest, settings))
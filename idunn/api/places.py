@@ -1,43 +1,246 @@
 import logging
+import functools
 from elasticsearch import Elasticsearch
-from apistar.exceptions import BadRequest
+from apistar import http
+from apistar.exceptions import BadRequest, NotFound
 
 from idunn.utils import prometheus
 from idunn.utils.settings import Settings
 from idunn.utils.index_names import IndexNames
+from idunn.utils.place_cache import PlaceCache
+from idunn.utils.blocking import run_blocking, run_sync, sync_call, blocking_call
+from idunn.utils.deadline import Deadline
+from idunn.utils.admin_cache import AdminNotCached
 from idunn.places import Place, Admin, Street, Address, POI
-from idunn.api.utils import get_geom, get_name, fetch_es_place, LONG, SHORT, DEFAULT_VERBOSITY
+from idunn.blocks import BLOCK_TYPE_TO_CLASS
+from idunn.api.serializers import SerializedJSONResponse, select_fields
+from idunn.api.http_cache import get_source_version, get_place_digest, is_etag_valid, get_place_headers, not_modified
+from idunn.api.utils import get_geom, get_name, fetch_es_place, fetch_es_places, LONG, SHORT, LIST, DEFAULT_VERBOSITY, BLOCKS_BY_VERBOSITY
 
 logger = logging.getLogger(__name__)
 
-VERBOSITY_LEVELS = [LONG, SHORT]
+VERBOSITY_LEVELS = [LONG, SHORT, LIST]
 
-def get_place(id, es: Elasticsearch, indices: IndexNames, settings: Settings, lang=None, type=None, verbosity=DEFAULT_VERBOSITY) -> Place:
-    """Main handler that returns the requested place"""
+SELECTABLE_BLOCK_TYPES = [b.BLOCK_TYPE for b in BLOCKS_BY_VERBOSITY[LONG]]
+SELECTABLE_FIELDS = list(Place.validator.properties)
+# The places of the list verbosity (map markers) are returned without address
+LIST_FIELDS = tuple(f for f in SELECTABLE_FIELDS if f != 'address')
+
+PLACE_LOADERS = {
+    "admin": Admin,
+    "street": Street,
+    "addr": Address,
+    "poi": POI,
+}
+
+def validate_verbosity(verbosity):
     if verbosity not in VERBOSITY_LEVELS:
         raise BadRequest(
             status_code=400,
             detail={"message": f"verbosity {verbosity} does not belong to the set of possible verbosity values={VERBOSITY_LEVELS}"}
         )
 
-    if not lang:
-        lang = settings['DEFAULT_LANGUAGE']
-    lang = lang.lower()
+def split_values(values):
+    """
+    >>> split_values('phone,opening_hours,phone,')
+    ('opening_hours', 'phone')
+    """
+    return tuple(sorted(set(v for v in values.split(',') if v)))
+
+def get_fields(fields, verbosity):
+    """Returns the selected top-level fields of the place,
+    or None if all the fields are returned.
+    """
+    if fields is None:
+        return LIST_FIELDS if verbosity == LIST else None
+    fields = split_values(fields)
+    for field in fields:
+        if field not in SELECTABLE_FIELDS:
+            raise BadRequest(
+                status_code=400,
+                detail={"message": f"field {field} does not belong to the set of possible fields={SELECTABLE_FIELDS}"}
+            )
+    return fields
 
-    es_place = fetch_es_place(id, es, indices, type)
+def get_block_types(blocks, fields):
+    """Returns the selected block types, or None if the
+    blocks are built depending on the verbosity.
 
-    places = {
-        "admin": Admin,
-        "street": Street,
-        "addr": Address,
-        "poi": POI,
-    }
+    No block is built when the "blocks" field is not selected.
+    """
+    if fields is not None and 'blocks' not in fields:
+        return ()
+    if blocks is None:
+        return None
+    block_types = split_values(blocks)
+    for block_type in block_types:
+        if block_type not in BLOCK_TYPE_TO_CLASS:
+            raise BadRequest(
+                status_code=400,
+                detail={"message": f"unknown block type: {block_type}"}
+            )
+        if block_type not in SELECTABLE_BLOCK_TYPES:
+            raise BadRequest(
+                status_code=400,
+                detail={"message": f"block {block_type} does not belong to the set of blocks that can be selected={SELECTABLE_BLOCK_TYPES}"}
+            )
+    return block_types
+
+def get_lang(lang, settings):
+    if not lang:
+        lang = settings['DEFAULT_LANGUAGE']
+    return lang.lower()
 
-    loader = places.get(es_place[0].get('_type'))
+def load_place(id, es_place, lang, settings, verbosity, block_types=None):
+    """Builds the place from its raw ES document,
+    or returns None if the document has an unexpected type.
+    """
+    loader = PLACE_LOADERS.get(es_place.get('_type'))
 
     if loader is None:
         prometheus.exception("FoundPlaceWithWrongType")
-        logger.error("The place with the id {} has a wrong type: {}".format(id, es_place[0].get('_type')))
+        logger.error("The place with the id {} has a wrong type: {}".format(id, es_place.get('_type')))
         return None
 
-    return loader.load_place(es_place[0]['_source'], lang, settings, verbosity)
+    return loader.load_place(es_place['_source'], lang, settings, verbosity, block_types)
+
+def log_admin_not_cached(id):
+    """The admins of the places are resolved when they are fetched (see
+    fetch_es_place): a place loaded with an admin that is neither cached
+    nor fetched with its fields is fetched again with them.
+    """
+    prometheus.exception("AdminNotCached")
+    logger.warning("The place %s was fetched without the fields of its admins", id, exc_info=True)
+
+def place_response(place, digest, headers, settings, fields=None):
+    """Returns the place (or its selected fields) with its ETag and Cache-Control headers,
+    or a 304 response when the ETag sent in the If-None-Match header is still valid.
+    """
+    if place is None:
+        return SerializedJSONResponse(place)
+    if is_etag_valid(headers, digest):
+        return not_modified(place, digest, settings)
+    content = place if fields is None else select_fields(place, fields)
+    return SerializedJSONResponse(content, headers=get_place_headers(place, digest, settings))
+
+async def respond_place(id, settings, headers, lang, type, verbosity, blocks, fields, fetch, load):
+    """Returns the place response, shared by get_place and get_place_async
+
+    fetch(id, type=..., verbosity=...) returns the raw ES documents of the
+    place and load(id, es_place, lang, settings, verbosity, block_types)
+    builds it: they are coroutine functions, that run the blocking calls
+    directly for get_place and in the BlockingExecutor for get_place_async.
+    """
+    validate_verbosity(verbosity)
+    lang = get_lang(lang, settings)
+    fields = get_fields(fields, verbosity)
+    block_types = get_block_types(blocks, fields)
+    # The fields of all the blocks that can be selected are fetched
+    fetch_verbosity = verbosity if block_types is None else LONG
+
+    cache_key = PlaceCache.get_key(id, type, lang, verbosity, block_types)
+    place, source_version = PlaceCache.get_with_version(cache_key)
+    if place is None:
+        es_place = await fetch(id, type=type, verbosity=fetch_verbosity)
+        try:
+            place = await load(id, es_place[0], lang, settings, verbosity, block_types)
+        except AdminNotCached:
+            log_admin_not_cached(id)
+            es_place = await fetch(id, type=type, verbosity=fetch_verbosity, full_admins=True)
+            place = await load(id, es_place[0], lang, settings, verbosity, block_types)
+        if place is None:
+            return place_response(place, None, headers, settings)
+        source_version = get_source_version(es_place[0])
+        PlaceCache.set(cache_key, place, source_version)
+
+    digest = get_place_digest(place, source_version, cache_key + (fields,))
+    return place_response(place, digest, headers, settings, fields)
+
+def get_place(id, es: Elasticsearch, indices: IndexNames, settings: Settings, headers: http.Headers, lang=None, type=None, verbosity=DEFAULT_VERBOSITY, blocks=None, fields=None) -> Place:
+    """Main handler that returns the requested place
+
+    The "blocks" and "fields" parameters (comma separated) restrict the
+    place to some blocks and top-level fields: only these blocks are built.
+
+    A 304 response is returned when the ETag sent in the If-None-Match
+    header is still valid: the place is then taken from the PlaceCache
+    (until its next opening hours transition) or built again.
+    """
+    fetch = sync_call(functools.partial(fetch_es_place, es=es, indices=indices))
+    return run_sync(respond_place(id, settings, headers, lang, type, verbosity, blocks, fields, fetch, sync_call(load_place)))
+
+async def get_place_async(id, es: Elasticsearch, indices: IndexNames, settings: Settings, deadline: Deadline, headers: http.Headers, lang=None, type=None, verbosity=DEFAULT_VERBOSITY, blocks=None, fields=None) -> Place:
+    """Async version of get_place, used by the async app
+
+    The ES request and the blocks (that may call Wikipedia)
+    are run in the BlockingExecutor.
+    """
+    fetch = blocking_call(functools.partial(fetch_es_place, es=es, indices=indices), deadline)
+    return await respond_place(id, settings, headers, lang, type, verbosity, blocks, fields, fetch, blocking_call(load_place, deadline))
+
+def get_places(ids, es: Elasticsearch, indices: IndexNames, settings: Settings, lang=None, type=None, verbosity=DEFAULT_VERBOSITY) -> dict:
+    """Handler that returns several places at once
+
+    The ids are separated by commas. The places are fetched
+    with a single ES request, and each id that cannot be returned
+    gets an error instead of failing the whole request.
+    """
+    validate_verbosity(verbosity)
+    lang = get_lang(lang, settings)
+    fields = get_fields(None, verbosity)
+
+    # remove the duplicates but keep the order
+    ids = list(dict.fromkeys(id for id in ids.split(',') if id))
+
+    max_size = int(settings['PLACES_BATCH_MAX_SIZE'])
+    if len(ids) == 0 or len(ids) > max_size:
+        raise BadRequest(
+            status_code=400,
+            detail={"message": f"the number of ids must be between 1 and {max_size}"}
+        )
+
+    cached_places = {}
+    for id in ids:
+        place = PlaceCache.get(PlaceCache.get_key(id, type, lang, verbosity))
+        if place is not None:
+            cached_places[id] = place
+
+    missing_ids = [id for id in ids if id not in cached_places]
+    es_places = {}
+    if missing_ids:
+        es_places = fetch_es_places(missing_ids, es, indices, type, verbosity)
+
+    places = []
+    errors = []
+    for id in ids:
+        place = cached_places.get(id)
+        if place is None:
+            es_place = es_places.get(id)
+            if es_place is None:
+                errors.append({"id": id, "message": f"place {id} not found with type={type}"})
+                continue
+
+            try:
+                place = load_place(id, es_place, lang, settings, verbosity)
+            except AdminNotCached:
+                log_admin_not_cached(id)
+                try:
+                    es_place = fetch_es_place(id, es, indices, type, verbosity, full_admins=True)[0]
+                except NotFound:
+                    errors.append({"id": id, "message": f"place {id} not found with type={type}"})
+                    continue
+                place = load_place(id, es_place, lang, settings, verbosity)
+            if place is None:
+                errors.append({"id": id, "message": f"place {id} has a wrong type"})
+                continue
+            PlaceCache.set(PlaceCache.get_key(id, type, lang, verbosity), place, get_source_version(es_place))
+        places.append(place if fields is None else select_fields(place, fields))
+
+    return SerializedJSONResponse({
+        "places": places,
+        "errors": errors
+    })
+
+async def get_places_async(ids, es: Elasticsearch, indices: IndexNames, settings: Settings, deadline: Deadline, lang=None, type=None, verbosity=DEFAULT_VERBOSITY) -> dict:
+    """Async version of get_places, used by the async app"""
+    return await run_blocking(deadline.wrap(get_places), ids, es, indices, settings, lang, type, verbosity)
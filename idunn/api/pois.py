@@ -3,6 +3,9 @@ from elasticsearch import Elasticsearch
 
 from idunn.places import POI
 from idunn.utils.settings import Settings
+from idunn.utils.blocking import run_blocking
+from idunn.utils.deadline import Deadline
+from idunn.api.serializers import SerializedJSONResponse
 from idunn.api.utils import fetch_es_poi, DEFAULT_VERBOSITY
 
 def get_poi(id, es: Elasticsearch, settings: Settings, lang=None) -> POI:
@@ -13,4 +16,8 @@ def get_poi(id, es: Elasticsearch, settings: Settings, lang=None) -> POI:
 
     es_poi = fetch_es_poi(id, es)
     poi = POI.load_poi(es_poi, lang, DEFAULT_VERBOSITY)
-    return poi
+    return SerializedJSONResponse(poi)
+
+async def get_poi_async(id, es: Elasticsearch, settings: Settings, deadline: Deadline, lang=None) -> POI:
+    """Async version of get_poi, used by the async app"""
+    return await run_blocking(deadline.wrap(get_poi), id, es, settings, lang)
@@ -0,0 +1,116 @@
+"""
+    The places and blocks are turned into JSON by serializers
+    compiled once for each class, from the validators of its fields,
+    instead of being introspected field by field by apistar.
+"""
+from apistar import types, validators
+from apistar.http import JSONResponse
+
+from idunn.blocks import ALL_BLOCKS
+from idunn.places import ALL_PLACES
+from idunn.utils import json_codec
+
+
+_serializers = {}
+
+
+def get_serializer(type_class):
+    """
+    Returns the function converting an instance of the Type class into
+    a value that can be encoded as JSON (dicts, lists and scalars)
+    """
+    serializer = _serializers.get(type_class)
+    if serializer is None:
+        serializer = compile_serializer(type_class)
+        _serializers[type_class] = serializer
+    return serializer
+
+
+def compile_serializer(type_class):
+    serialized_fields = getattr(type_class, 'SERIALIZED_FIELDS', None)
+    fields = [
+        (key, compile_field(validator))
+        for key, validator in type_class.validator.properties.items()
+        if serialized_fields is None or key in serialized_fields
+    ]
+
+    def serialize(obj):
+        values = obj._dict
+        result = {}
+        for key, convert in fields:
+            if key in values:
+                value = values[key]
+                if convert is not None and value is not None:
+                    value = convert(value)
+                result[key] = value
+        return result
+
+    return serialize
+
+
+def compile_field(validator):
+    """
+    Returns the conversion of the values of the field,
+    or None if they can be encoded as they are
+    """
+    if isinstance(validator, type) and issubclass(validator, types.Type):
+        return serialize_value
+    if getattr(validator, 'format', None) in validators.FORMATS:
+        return validators.FORMATS[validator.format].to_string
+    if isinstance(validator, validators.Array):
+        items = validator.items
+        if isinstance(items, type) and issubclass(items, types.Type):
+            # The items are dicts for the places built without validation
+            serialize_item = get_serializer(items)
+            return lambda values: [
+                serialize_item(v) if isinstance(v, types.Type) else v
+                for v in values
+            ]
+        if isinstance(items, (validators.String, validators.NumericType, validators.Boolean)):
+            return None
+        # eg. the blocks, whose classes are known only at runtime
+        return lambda values: [serialize_value(v) for v in values]
+    return None
+
+
+def serialize_value(value):
+    """
+    Converts a value that may contain Types into a value
+    that can be encoded as JSON
+    """
+    if isinstance(value, types.Type):
+        return get_serializer(type(value))(value)
+    if isinstance(value, dict):
+        return {k: serialize_value(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [serialize_value(v) for v in value]
+    return value
+
+
+def select_fields(place, fields) -> dict:
+    """
+    Returns the serialized place with only the given fields
+    (its id and type are always kept)
+    """
+    return {
+        key: value for key, value in serialize_value(place).items()
+        if key in fields or key in ('id', 'type')
+    }
+
+
+def render_json(value) -> bytes:
+    return json_codec.dumpb(serialize_value(value))
+
+
+class SerializedJSONResponse(JSONResponse):
+    """
+    JSON response of a value (a place, a list of places...),
+    encoded with the compiled serializers
+    """
+
+    def render(self, content) -> bytes:
+        return render_json(content)
+
+
+for type_class in ALL_PLACES + ALL_BLOCKS:
+    get_serializer(type_class)
@@ -1,8 +1,8 @@
 from apistar import Route
 from apistar_prometheus import expose_metrics, expose_metrics_multiprocess
 
-from .pois import get_poi
-from .places import get_place
+from .pois import get_poi, get_poi_async
+from .places import get_place, get_place_async, get_places, get_places_async
 from .status import get_status
 
 def get_metric_handler(settings):
@@ -16,9 +16,18 @@ def get_api_urls(settings):
     and handlers to build response
     """
     metric_handler = get_metric_handler(settings)
+    if settings['ASYNC_APP']:
+        return [
+            Route('/metrics', 'GET', handler=metric_handler),
+            Route('/status', 'GET', handler=get_status),
+            Route('/pois/{id}', 'GET', handler=get_poi_async),
+            Route('/places/{id}', 'GET', handler=get_place_async),
+            Route('/places', 'GET', handler=get_places_async),
+        ]
     return [
         Route('/metrics', 'GET', handler=metric_handler),
         Route('/status', 'GET', handler=get_status),
         Route('/pois/{id}', 'GET', handler=get_poi),
         Route('/places/{id}', 'GET', handler=get_place),
+        Route('/places', 'GET', handler=get_places),
     ]
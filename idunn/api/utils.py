@@ -1,8 +1,20 @@
+import logging
+from concurrent.futures import wait
 from apistar.exceptions import NotFound, BadRequest
-from idunn.blocks import PhoneBlock, OpeningHourBlock, InformationBlock, WebSiteBlock, ContactBlock
+from idunn.utils import prometheus
+from idunn.utils.mimir_cache import MimirCache
+from idunn.utils.admin_cache import AdminCache
+from idunn.utils.blocking import BlocksExecutor
+from idunn.utils.deadline import get_current_deadline, get_timeout
+from idunn.utils.properties import get_properties
+from idunn.blocks import PhoneBlock, OpeningHourBlock, OpeningStatusBlock, InformationBlock, WebSiteBlock, ContactBlock
+from idunn.blocks.base import PartialBlockList
+
+logger = logging.getLogger(__name__)
 
 LONG = "long"
 SHORT = "short"
+LIST = "list" # for the map markers
 DEFAULT_VERBOSITY = LONG
 
 BLOCKS_BY_VERBOSITY = {
@@ -15,9 +27,23 @@ BLOCKS_BY_VERBOSITY = {
     ],
     SHORT: [
         OpeningHourBlock
+    ],
+    LIST: [
+        OpeningStatusBlock
     ]
 }
 
+def get_source_filter(place_type, verbosity, full_admins=False) -> dict:
+    """Returns the '_source' filter for a place of the given type,
+    ie. only the fields required to build the place and its blocks.
+    """
+    from idunn.places import PLACE_TYPE_TO_CLASS
+    place_class = PLACE_TYPE_TO_CLASS[place_type]
+    return {
+        "include": place_class.get_source_fields(verbosity, full_admins),
+        "exclude": place_class.SOURCE_EXCLUDES
+    }
+
 def fetch_es_poi(id, es) -> dict:
     """Returns the raw POI data
     @deprecated by fetch_es_place()
@@ -25,63 +51,253 @@ def fetch_es_poi(id, es) -> dict:
     This function gets from Elasticsearch the
     entry corresponding to the given id.
     """
-    es_pois = es.search(index='munin_poi',
-                        body={
-                            "filter": {
-                                "term": {"_id": id}
-                            }
-                        })
-
-    es_poi = es_pois.get('hits', {}).get('hits', [])
-    if len(es_poi) == 0:
+    source_filter = get_source_filter('poi', DEFAULT_VERBOSITY, full_admins=True)
+    es_poi = es.get(
+        index='munin_poi',
+        id=id,
+        _source_include=source_filter['include'],
+        _source_exclude=source_filter['exclude'],
+        ignore=404,
+        request_timeout=get_timeout()
+    )
+    if not es_poi.get('found'):
         raise NotFound(detail={'message': f"poi '{id}' not found"})
-    result = es_poi[0]['_source']
-
-    # Flatten properties into result
-    properties = {p.get('key'): p.get('value') for p in result.get('properties')}
-    result['properties'] = properties
-    return result
+    # The hit is not modified: the properties are read through a view
+    result = es_poi['_source']
+    return dict(result, properties=get_properties(result))
 
-def fetch_es_place(id, es, indices, type) -> list:
-    """Returns the raw Place data
+def get_candidate_types(id, indices, type) -> list:
+    """Returns the types of place that may correspond to the id
 
-    This function gets from Elasticsearch the
-    entry corresponding to the given id.
+    Only one type is returned when the type is given or can be
+    deduced from the prefix of the id.
     """
     if type is None:
-        index_name = "munin"
+        type = indices.get_type_from_id(id)
+        if type is None:
+            return list(indices.keys())
     elif type not in indices:
         raise BadRequest(
             status_code=400,
             detail={"message": f"Wrong type parameter: type={type}"}
         )
+    return [type]
+
+def get_cache_key(mget_docs, verbosity):
+    """Returns the key of a place in the MimirCache: its id, the index (or
+    the candidate indices) it is fetched from, and the verbosity
+    since the fields fetched depend on it.
+    """
+    return (
+        mget_docs[0]['_id'],
+        tuple(doc['_index'] for doc in mget_docs),
+        verbosity
+    )
+
+def get_mget_docs(id, indices, type, verbosity, full_admins=False) -> list:
+    """Returns the multi-get requests of the candidate indices of a place"""
+    return [
+        {
+            "_index": indices[place_type],
+            "_id": id,
+            "_source": get_source_filter(place_type, verbosity, full_admins)
+        }
+        for place_type in get_candidate_types(id, indices, type)
+    ]
+
+def resolve_admins(es_doc):
+    """Returns the document with the fields of its admins taken from the
+    AdminCache when only their ids were fetched, or None if some of them
+    are not in the cache.
+
+    The (cached) document itself is not modified.
+    """
+    from idunn.places import ALL_PLACES
+    resolved_doc = es_doc
+    for path in {p.ADMINS_PATH for p in ALL_PLACES if p.ADMINS_PATH}:
+        keys = path.split('.')
+        raw_admins = es_doc.get('_source')
+        for key in keys:
+            raw_admins = raw_admins.get(key) if isinstance(raw_admins, dict) else None
+        if not raw_admins or all(AdminCache.is_complete(raw_admin) for raw_admin in raw_admins):
+            continue
+
+        admins = [AdminCache.resolve(raw_admin) for raw_admin in raw_admins]
+        if any(admin is None for admin in admins):
+            return None
+        if resolved_doc is es_doc:
+            resolved_doc = dict(es_doc, _source=dict(es_doc['_source']))
+        parent = resolved_doc['_source']
+        for key in keys[:-1]:
+            parent[key] = dict(parent[key])
+            parent = parent[key]
+        parent[keys[-1]] = admins
+    return resolved_doc
+
+def get_es_docs(id, es, mget_docs) -> list:
+    """Returns the documents of the place found in the candidate indices"""
+    if len(mget_docs) == 1:
+        source_filter = mget_docs[0]['_source']
+        es_docs = [
+            es.get(
+                index=mget_docs[0]['_index'],
+                id=id,
+                _source_include=source_filter['include'],
+                _source_exclude=source_filter['exclude'],
+                ignore=404,
+                request_timeout=get_timeout()
+            )
+        ]
     else:
-        index_name = indices.get(type)
+        es_docs = es.mget(body={"docs": mget_docs}, request_timeout=get_timeout()).get('docs', [])
+    return [doc for doc in es_docs if doc.get('found')]
 
-    es_places = es.search(index=index_name,
-        body={
-            "filter": {
-                "term": {"_id": id}
-            }
-        })
+def fetch_es_place(id, es, indices, type, verbosity=DEFAULT_VERBOSITY, full_admins=False) -> list:
+    """Returns the raw Place data
+
+    This function gets from Elasticsearch the
+    entry corresponding to the given id.
 
-    es_place = es_places.get('hits', {}).get('hits', [])
-    if len(es_place) == 0:
-        raise NotFound(detail={'message': f"place {id} not found with type={type}"})
+    The document is fetched with the real-time GET API when its index is
+    known, and with a multi-get over the candidate indices otherwise.
+    The result has the same structure as the hits of a search.
+    Only the fields required for the verbosity are fetched.
+
+    The documents found are kept in the in-process MimirCache.
+    The fields of the admins are taken from the AdminCache, and the
+    place is fetched again with them if they are not in the cache.
+    With full_admins, the place is fetched from ES with its admins.
+    """
+    mget_docs = get_mget_docs(id, indices, type, verbosity, full_admins)
+
+    cache_key = get_cache_key(mget_docs, verbosity)
+    es_place = None if full_admins else MimirCache.get(es, indices, cache_key)
+    if es_place is None:
+        es_place = get_es_docs(id, es, mget_docs)
+        if len(es_place) == 0:
+            raise NotFound(detail={'message': f"place {id} not found with type={type}"})
+        MimirCache.set(cache_key, es_place)
+
+    resolved_place = [resolve_admins(doc) for doc in es_place]
+    if any(doc is None for doc in resolved_place):
+        es_place = get_es_docs(id, es, get_mget_docs(id, indices, type, verbosity, full_admins=True))
+        if len(es_place) == 0:
+            raise NotFound(detail={'message': f"place {id} not found with type={type}"})
+        MimirCache.set(cache_key, es_place)
+    else:
+        es_place = resolved_place
 
     return es_place
 
-def build_blocks(es_poi, lang, verbosity):
+def fetch_es_places(ids, es, indices, type, verbosity=DEFAULT_VERBOSITY) -> dict:
+    """Returns the raw data of several places, by id
+
+    The places that are not in the MimirCache are fetched in a
+    single multi-get request, and the places whose admins are not
+    in the AdminCache (see fetch_es_place) in a second one.
+    The ids that are not found are missing from the result.
+    """
+    es_places = {}
+    cache_keys = {}
+    mget_docs = []
+    for id in ids:
+        id_mget_docs = get_mget_docs(id, indices, type, verbosity)
+        cache_keys[id] = get_cache_key(id_mget_docs, verbosity)
+        es_place = MimirCache.get(es, indices, cache_keys[id])
+        if es_place is not None:
+            es_places[id] = es_place[0]
+        else:
+            mget_docs.extend(id_mget_docs)
+
+    if mget_docs:
+        es_docs = es.mget(body={"docs": mget_docs}, request_timeout=get_timeout()).get('docs', [])
+        for doc in es_docs:
+            if doc.get('found') and doc['_id'] not in es_places:
+                es_places[doc['_id']] = doc
+                MimirCache.set(cache_keys[doc['_id']], [doc])
+
+    full_mget_docs = []
+    for id, doc in es_places.items():
+        resolved_doc = resolve_admins(doc)
+        if resolved_doc is not None:
+            es_places[id] = resolved_doc
+        else:
+            full_mget_docs.extend(get_mget_docs(id, indices, type, verbosity, full_admins=True))
+
+    if full_mget_docs:
+        es_docs = es.mget(body={"docs": full_mget_docs}, request_timeout=get_timeout()).get('docs', [])
+        for doc in es_docs:
+            if doc.get('found'):
+                es_places[doc['_id']] = doc
+                MimirCache.set(cache_keys[doc['_id']], [doc])
+
+    return es_places
+
+def get_block_classes(verbosity, block_types=None) -> list:
+    """Returns the classes of the blocks to build: the blocks of the
+    verbosity, or the selected block types (in the order of the long verbosity).
+
+    >>> [c.BLOCK_TYPE for c in get_block_classes(LONG, ['information', 'opening_hours'])]
+    ['opening_hours', 'information']
+    """
+    if block_types is None:
+        return BLOCKS_BY_VERBOSITY.get(verbosity)
+    return [c for c in BLOCKS_BY_VERBOSITY[LONG] if c.BLOCK_TYPE in block_types]
+
+def build_blocks(es_poi, lang, verbosity, block_types=None):
     """Returns the list of blocks we want
-    depending on the verbosity.
+    depending on the verbosity, or the selected block types.
+
+    The blocks whose trigger keys are not in the properties of the POI
+    are skipped. The others are built concurrently, and the blocks that are not
+    built within BLOCKS_TIMEOUT seconds (or before the deadline of the
+    request) are left out: the list is then a PartialBlockList.
+    The deadline of the request is activated in the threads building
+    the blocks, so that their calls to Wikipedia and Redis are bound
+    by it (the blocks left out keep running until then).
     """
+    from app import settings
+    timeout = float(settings['BLOCKS_TIMEOUT'])
+    properties = get_properties(es_poi)
+    block_classes = [c for c in get_block_classes(verbosity, block_types) if c.is_triggered(properties)]
+
+    if timeout <= 0:
+        # No deadline: the blocks are built one after another
+        blocks = []
+        for c in block_classes:
+            block = c.from_es(es_poi, lang)
+            if block is not None:
+                blocks.append(block)
+        return blocks
+
+    executor = BlocksExecutor.get_executor()
+    deadline = get_current_deadline()
+    if deadline is not None:
+        futures = [executor.submit(deadline.wrap(c.from_es), es_poi, lang) for c in block_classes]
+        timeout = min(timeout, deadline.remaining())
+    else:
+        futures = [executor.submit(c.from_es, es_poi, lang) for c in block_classes]
+    wait(futures, timeout=timeout)
+
     blocks = []
-    for c in BLOCKS_BY_VERBOSITY.get(verbosity):
-        block = c.from_es(es_poi, lang)
+    for c, future in zip(block_classes, futures):
+        if not future.done():
+            prometheus.block_timeout(c.BLOCK_TYPE)
+            logger.warning("The block '%s' was not built in time for the place %s", c.BLOCK_TYPE, es_poi.get('id'))
+            future.add_done_callback(log_block_error)
+            blocks = PartialBlockList(blocks)
+            continue
+        block = future.result()
         if block is not None:
             blocks.append(block)
     return blocks
 
+def log_block_error(future):
+    """Logs the error of a block built in the background"""
+    exc = future.exception()
+    if exc is not None:
+        logger.error("Failed to build a block in the background", exc_info=exc)
+
 def get_geom(es_place):
     """Return the correct geometry from the elastic response
 
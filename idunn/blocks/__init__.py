@@ -1,4 +1,4 @@
-from .opening_hour import OpeningHourBlock
+from .opening_hour import OpeningHourBlock, OpeningStatusBlock
 from .phone import PhoneBlock
 from .information import InformationBlock
 from .website import WebSiteBlock
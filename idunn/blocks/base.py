@@ -1,7 +1,55 @@
 from apistar import types, validators
+from idunn.utils.properties import get_properties
+
+
+class TypeValidation:
+    """
+    The places and blocks are built by Idunn from valid values,
+    so their fields are validated only if VALIDATE_TYPES is set
+    (in the tests, or to debug).
+    """
+    _enabled = None
+
+    @classmethod
+    def is_enabled(cls):
+        if cls._enabled is None:
+            from app import settings
+            cls._enabled = bool(settings['VALIDATE_TYPES'])
+        return cls._enabled
+
+
+def set_trusted_fields(obj, values):
+    """
+    Sets the fields of the Type object without validating them,
+    unless validation is enabled.
+    Returns False if the fields still have to be validated.
+
+    Only the fields with a format (eg. a date) are converted, as the
+    validator would do, since they are formatted back when they are read.
+    """
+    if TypeValidation.is_enabled():
+        return False
+    fields = {}
+    for key, validator in obj.validator.properties.items():
+        if key in values:
+            value = values[key]
+            if value is not None and getattr(validator, 'format', None) in validators.FORMATS:
+                value = validator.validate(value)
+        elif validator.has_default():
+            value = validator.default
+        else:
+            # A required field is missing: the validation raises the error
+            return False
+        fields[key] = value
+    object.__setattr__(obj, '_dict', fields)
+    return True
+
 
 class BaseBlock(types.Type):
     BLOCK_TYPE = '' # To override in each subclass
+    SOURCE_FIELDS = [] # Fields of the ES document read by the block
+    TRIGGER_KEYS = None # Properties of the POI the block is built from, None if it does not depend on them
+    SERIALIZED_FIELDS = None # Fields returned in the JSON of the block, None for all of them
 
     type = validators.String()
 
@@ -13,12 +61,55 @@ class BaseBlock(types.Type):
                     self.__class__.__name__
                 )
             kwargs['type'] = self.BLOCK_TYPE
+            if set_trusted_fields(self, kwargs):
+                return
         super().__init__(*args, **kwargs)
 
     @classmethod
     def from_es(cls, es_poi, lang):
         raise NotImplementedError
 
+    @classmethod
+    def get_source_fields(cls):
+        if cls.TRIGGER_KEYS is None:
+            return cls.SOURCE_FIELDS
+        return cls.SOURCE_FIELDS + ['properties']
+
+    @classmethod
+    def is_triggered(cls, properties):
+        """
+        Returns False if the block cannot be built for the POI,
+        since none of its trigger keys is in its properties
+        """
+        return cls.TRIGGER_KEYS is None or any(key in properties for key in cls.TRIGGER_KEYS)
+
+    @classmethod
+    def build(cls, es_poi, lang):
+        """
+        Same as from_es, but the block is skipped early
+        if it is not triggered by the properties of the POI
+        """
+        if not cls.is_triggered(get_properties(es_poi)):
+            return None
+        return cls.from_es(es_poi, lang)
+
+
+def replace_fields(obj, **changes):
+    """
+    Returns a copy of the (already validated) Type object
+    with some fields replaced, without validating it again.
+    """
+    new_obj = object.__new__(type(obj))
+    object.__setattr__(new_obj, '_dict', dict(obj._dict, **changes))
+    return new_obj
+
+
+class PartialBlockList(list):
+    """
+    List of blocks in which some blocks are missing,
+    since they could not be built before the deadline.
+    """
+
 
 class TypedBlockValidator(validators.Object):
     errors = {
@@ -43,6 +134,9 @@ class TypedBlockValidator(validators.Object):
             self.error('unknown_type', value)
         if self.allowed_blocks and block_class not in self.allowed_blocks:
             self.error('not_allowed_block', value)
+        if isinstance(value, block_class):
+            # eg. an OpeningStatusBlock, with the type of OpeningHourBlock
+            block_class = type(value)
 
         return block_class.validate(value=value, definitions=definitions,
                                     allow_coerce=allow_coerce)
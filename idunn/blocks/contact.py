@@ -3,16 +3,19 @@ import requests
 from requests.exceptions import HTTPError, RequestException, Timeout
 from apistar import validators
 
+from idunn.utils.properties import get_properties
 from .base import BaseBlock, BlocksValidator
 
 class ContactBlock(BaseBlock):
     BLOCK_TYPE = "contact"
+    TRIGGER_KEYS = ['email', 'contact:email']
 
     url = validators.String()
 
     @classmethod
     def from_es(cls, es_poi, lang):
-        mail = es_poi.get('properties', {}).get('email') or es_poi.get('properties', {}).get('contact:email')
+        properties = get_properties(es_poi)
+        mail = properties.get('email') or properties.get('contact:email')
         if mail is None:
             return None
 
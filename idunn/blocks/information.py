@@ -5,6 +5,7 @@ from idunn.blocks.wikipedia import WikipediaBlock
 
 class InformationBlock(BaseBlock):
     BLOCK_TYPE = "information"
+    TRIGGER_KEYS = WikipediaBlock.TRIGGER_KEYS + ServicesAndInformationBlock.TRIGGER_KEYS
 
     blocks = BlocksValidator(allowed_blocks=[WikipediaBlock, ServicesAndInformationBlock])
 
@@ -12,8 +13,8 @@ class InformationBlock(BaseBlock):
     def from_es(cls, es_poi, lang):
         blocks = []
 
-        wikipedia_block = WikipediaBlock.from_es(es_poi, lang)
-        services_block = ServicesAndInformationBlock.from_es(es_poi, lang)
+        wikipedia_block = WikipediaBlock.build(es_poi, lang)
+        services_block = ServicesAndInformationBlock.build(es_poi, lang)
 
         if wikipedia_block is not None:
             blocks.append(wikipedia_block)
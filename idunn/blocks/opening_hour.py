@@ -1,29 +1,18 @@
 import logging
 from datetime import datetime, timedelta, date
-from pytz import timezone, UTC
+from pytz import UTC
 from apistar import validators, types
-from tzwhere import tzwhere
-import humanized_opening_hours as hoh
 from humanized_opening_hours.exceptions import HOHError, NextChangeRecursionError
 
+from idunn.utils import prometheus
+from idunn.utils.properties import get_properties
+from idunn.utils.timezone_cache import TimezoneCache
+from idunn.utils.opening_hours_cache import OpeningHoursCache
 from .base import BaseBlock
 
 
 logger = logging.getLogger(__name__)
 
-"""
-We load the tz structure once when Idunn starts since it's a time consuming step
-"""
-tz = tzwhere.tzwhere(forceTZ=True)
-
-def get_tz(poi_tzname, lat, lon):
-    """
-    Returns the timezone corresponding to the coordinates of the POI.
-    """
-    if lon is not None and lat is not None:
-        return timezone(poi_tzname)
-    return None
-
 def get_coord(es_poi):
     """
     Returns the coordinates from the POI json
@@ -48,17 +37,21 @@ class DaysType(types.Type):
 
 class OpeningHourBlock(BaseBlock):
     BLOCK_TYPE = 'opening_hours'
+    SOURCE_FIELDS = ['id', 'coord']
+    TRIGGER_KEYS = ['opening_hours']
 
     status = validators.String(enum=['open', 'closed'])
     next_transition_datetime = validators.String(allow_null=True)
     seconds_before_next_transition = validators.Integer(allow_null=True)
     is_24_7 = validators.Boolean()
     raw = validators.String()
-    days = validators.Array(items=DaysType)
+    days = validators.Array(items=DaysType, allow_null=True)
+
+    WITH_DAYS = True # False to skip the calendar of the week
 
     @classmethod
     def from_es(cls, es_poi, lang):
-        raw = es_poi.get('properties', {}).get('opening_hours')
+        raw = get_properties(es_poi).get('opening_hours')
         if raw is None:
             return None
 
@@ -68,23 +61,18 @@ class OpeningHourBlock(BaseBlock):
 
         is247 = raw == '24/7'
 
-        poi_tzname = tz.tzNameAt(poi_lat, poi_lon, forceTZ=True)
-        poi_tz = get_tz(poi_tzname, poi_lat, poi_lon)
-        poi_location = (poi_lat, poi_lon, poi_tzname, 24)
-
+        poi_tz = TimezoneCache.get_timezone(poi_lat, poi_lon)
         if poi_tz is None:
             logger.info("No timezone found for poi %s", es_poi.get('id'))
             return None
 
-        try:
-            oh = hoh.OHParser(raw, location=poi_location)
-        except HOHError:
-            logger.info("Failed to parse OSM opening_hour field", exc_info=True)
+        schedule = OpeningHoursCache.get_schedule(raw, poi_lat, poi_lon, poi_tz.zone)
+        if schedule is None:
             return None
 
         poi_dt = UTC.localize(datetime.utcnow()).astimezone(poi_tz)
 
-        if oh.is_open(poi_dt.replace(tzinfo=None)):
+        if schedule.is_open(poi_dt.replace(tzinfo=None)):
             status = 'open'
         else:
             status = 'closed'
@@ -95,15 +83,15 @@ class OpeningHourBlock(BaseBlock):
                 next_transition_datetime=None,
                 seconds_before_next_transition=None,
                 is_24_7=is247,
-                raw=oh.field,
-                days=cls.get_days(oh, dt=poi_dt)
+                raw=schedule.field,
+                days=cls.get_days(schedule, dt=poi_dt) if cls.WITH_DAYS else None
             )
 
         # The current version of the hoh lib doesn't allow to use the next_change() function
         # with an offset aware datetime.
         # This is why we replace the timezone info until this problem is fixed in the library.
         try:
-            nt = oh.next_change(dt=poi_dt.replace(tzinfo=None))
+            nt = schedule.next_change(poi_dt.replace(tzinfo=None))
         except HOHError:
             logger.info("HOHError: Failed to compute next transition for poi %s", es_poi.get('id'), exc_info=True)
             return None
@@ -121,8 +109,8 @@ class OpeningHourBlock(BaseBlock):
             next_transition_datetime=next_transition_datetime,
             seconds_before_next_transition=time_before_next,
             is_24_7=is247,
-            raw=oh.field,
-            days=cls.get_days(oh, dt=poi_dt)
+            raw=schedule.field,
+            days=cls.get_days(schedule, dt=poi_dt) if cls.WITH_DAYS else None
         )
 
     @staticmethod
@@ -137,13 +125,30 @@ class OpeningHourBlock(BaseBlock):
         return rounded.time()
 
     @classmethod
-    def get_days(cls, oh_parser, dt):
+    def get_days(cls, schedule, dt):
+        """
+        Returns the calendar of the week of dt
+
+        It only depends on the schedule and on the week: it is rendered
+        once a week for each schedule, that is shared by the POIs with
+        the same opening hours (see OpeningHoursCache).
+        """
         last_monday = dt.date() - timedelta(days=dt.weekday())
+        week = schedule.week
+        if week is not None and week[0] == last_monday:
+            prometheus.cache_hit('opening_hours_week')
+            return list(week[1])
+        prometheus.cache_miss('opening_hours_week')
+        days = cls.render_days(schedule, last_monday)
+        schedule.week = (last_monday, days)
+        return list(days)
+
+    @classmethod
+    def render_days(cls, schedule, last_monday):
         days = []
         for x in range(0,7):
             day = last_monday + timedelta(days=x)
-            oh_day = oh_parser.get_day(day)
-            periods = oh_day.opening_periods()
+            periods = schedule.get_periods(day)
             day_value = {
                 'dayofweek': day.isoweekday(),
                 'local_date': day.isoformat(),
@@ -163,3 +168,14 @@ class OpeningHourBlock(BaseBlock):
                 )
             days.append(day_value)
         return days
+
+
+class OpeningStatusBlock(OpeningHourBlock):
+    """
+    The opening hours block of the map markers: only the open/closed status
+    is returned, and the calendar of the week is not computed. The next
+    transition is kept (but not returned) for the caches of the place.
+    It has the same type as the full block, so it is not in ALL_BLOCKS.
+    """
+    WITH_DAYS = False
+    SERIALIZED_FIELDS = ['type', 'status']
@@ -1,10 +1,12 @@
 from apistar import types, validators
 
+from idunn.utils.properties import get_properties
 from .base import BaseBlock
 
 
 class PhoneBlock(BaseBlock):
     BLOCK_TYPE = 'phone'
+    TRIGGER_KEYS = ['phone', 'contact:phone']
 
     url = validators.String()
     international_format = validators.String()
@@ -12,7 +14,8 @@ class PhoneBlock(BaseBlock):
 
     @classmethod
     def from_es(cls, es_poi, lang):
-        raw = es_poi.get('properties', {}).get('phone') or es_poi.get('properties', {}).get('contact:phone')
+        properties = get_properties(es_poi)
+        raw = properties.get('phone') or properties.get('contact:phone')
         if raw is None:
             return None
 
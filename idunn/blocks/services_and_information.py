@@ -1,9 +1,11 @@
 from apistar import types, validators
+from idunn.utils.properties import get_properties
 from .base import BaseBlock, BlocksValidator
 
 
 class AccessibilityBlock(BaseBlock):
     BLOCK_TYPE = "accessibility"
+    TRIGGER_KEYS = ["wheelchair", "toilets:wheelchair"]
 
     STATUS_OK = "yes"
     STATUS_KO = "no"
@@ -19,7 +21,7 @@ class AccessibilityBlock(BaseBlock):
 
     @classmethod
     def from_es(cls, es_poi, lang):
-        properties = es_poi.get("properties", {})
+        properties = get_properties(es_poi)
 
         raw_wheelchair = properties.get("wheelchair")
         raw_toilets_wheelchair = properties.get("toilets:wheelchair")
@@ -56,12 +58,13 @@ class AccessibilityBlock(BaseBlock):
 
 class InternetAccessBlock(BaseBlock):
     BLOCK_TYPE = "internet_access"
+    TRIGGER_KEYS = ["wifi", "internet_access"]
 
     wifi = validators.Boolean()
 
     @classmethod
     def from_es(cls, es_poi, lang):
-        properties = es_poi.get("properties", {})
+        properties = get_properties(es_poi)
         wifi = properties.get("wifi")
         internet_access = properties.get("internet_access")
 
@@ -79,12 +82,13 @@ class Beer(types.Type):
 
 class BreweryBlock(BaseBlock):
     BLOCK_TYPE = "brewery"
+    TRIGGER_KEYS = ["brewery"]
 
     beers = validators.Array(items=Beer)
 
     @classmethod
     def from_es(cls, es_poi, lang):
-        brewery = es_poi.get("properties", {}).get("brewery")
+        brewery = get_properties(es_poi).get("brewery")
 
         if brewery is None:
             return None
@@ -96,6 +100,11 @@ class BreweryBlock(BaseBlock):
 
 class ServicesAndInformationBlock(BaseBlock):
     BLOCK_TYPE = "services_and_information"
+    TRIGGER_KEYS = (
+        AccessibilityBlock.TRIGGER_KEYS
+        + InternetAccessBlock.TRIGGER_KEYS
+        + BreweryBlock.TRIGGER_KEYS
+    )
 
     blocks = BlocksValidator(
         allowed_blocks=[AccessibilityBlock, InternetAccessBlock, BreweryBlock]
@@ -105,9 +114,9 @@ class ServicesAndInformationBlock(BaseBlock):
     def from_es(cls, es_poi, lang):
         blocks = []
 
-        access_block = AccessibilityBlock.from_es(es_poi, lang)
-        internet_block = InternetAccessBlock.from_es(es_poi, lang)
-        brewery_block = BreweryBlock.from_es(es_poi, lang)
+        access_block = AccessibilityBlock.build(es_poi, lang)
+        internet_block = InternetAccessBlock.build(es_poi, lang)
+        brewery_block = BreweryBlock.build(es_poi, lang)
 
         if access_block is not None:
             blocks.append(access_block)
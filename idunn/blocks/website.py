@@ -3,16 +3,19 @@ import requests
 from requests.exceptions import HTTPError, RequestException, Timeout
 from apistar import validators
 
+from idunn.utils.properties import get_properties
 from .base import BaseBlock, BlocksValidator
 
 class WebSiteBlock(BaseBlock):
     BLOCK_TYPE = "website"
+    TRIGGER_KEYS = ['contact:website', 'website']
 
     url = validators.String()
 
     @classmethod
     def from_es(cls, es_poi, lang):
-        website = es_poi.get('properties', {}).get('contact:website') or es_poi.get('properties', {}).get('website')
+        properties = get_properties(es_poi)
+        website = properties.get('contact:website') or properties.get('website')
         if website is None:
             return None
 
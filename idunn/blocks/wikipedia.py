@@ -1,15 +1,17 @@
-import json
 import logging
 import requests
 import pybreaker
 from apistar import validators
 from requests.exceptions import HTTPError, RequestException, Timeout
 from redis import Redis, ConnectionError as RedisConnectionError, TimeoutError, RedisError
-from elasticsearch import Elasticsearch, ConnectionError
+from elasticsearch import ConnectionError
 from redis_rate_limit import RateLimiter, TooManyRequests
 
-from idunn.utils import prometheus
+from idunn.utils import prometheus, json_codec
 from idunn.utils.redis import get_redis_pool, RedisNotConfigured
+from idunn.utils.es_wrapper import get_elasticsearch, WIKI_CLUSTER
+from idunn.utils.properties import get_properties
+from idunn.utils.deadline import DeadlineExceeded, check_deadline, get_timeout
 from .base import BaseBlock
 
 
@@ -91,7 +93,7 @@ class WikipediaBreaker:
         cls._breaker = pybreaker.CircuitBreaker(
             fail_max = settings['WIKI_API_CIRCUIT_MAXFAIL'],
             reset_timeout = settings['WIKI_API_CIRCUIT_TIMEOUT'],
-            exclude = [HTTPError40X],
+            exclude = [HTTPError40X, DeadlineExceeded],
             listeners=[LogListener()]
         )
 
@@ -104,6 +106,9 @@ class WikipediaBreaker:
     @classmethod
     def handle_requests_error(cls, f):
         def wrapped_f(*args, **kwargs):
+            # Neither the rate limiter nor the API is called
+            # once the time of the request is spent
+            check_deadline()
             breaker = cls.get_breaker()
             try:
                 return WikipediaLimiter.request(breaker(f))(*args, **kwargs)
@@ -148,6 +153,7 @@ class WikipediaCache:
 
     @classmethod
     def get_value(cls, key):
+        check_deadline()
         try:
             value_stored = cls._connection.get(key)
             return value_stored
@@ -192,9 +198,9 @@ class WikipediaCache:
                     # (and fetch wikipedia content, possibly very often)
                     return None
                 if value_stored is not None:
-                    return json.loads(value_stored.decode('utf-8'))
+                    return json_codec.loads(value_stored)
                 result = f(*args, **kwargs)
-                json_result = json.dumps(result)
+                json_result = json_codec.dumps(result)
                 cls.set_value(key, json_result)
                 return result
             return f(*args, **kwargs)
@@ -227,7 +233,7 @@ class WikipediaSession:
             resp = self.session.get(
                 url=url,
                 params={"redirect": True},
-                timeout=self.timeout
+                timeout=get_timeout(self.timeout)
             )
 
         if 400 <= resp.status_code < 500:
@@ -250,7 +256,7 @@ class WikipediaSession:
                     "formatversion": 2,
                     "format": "json",
                 },
-                timeout=self.timeout,
+                timeout=get_timeout(self.timeout),
             )
 
         if 400 <= resp.status_code < 500:
@@ -275,7 +281,6 @@ class WikiUndefinedException(Exception):
 
 
 class WikidataConnector:
-    _wiki_es = None
     _es_lang = None
 
     @classmethod
@@ -288,30 +293,20 @@ class WikidataConnector:
         return None
 
     @classmethod
-    def init_wiki_es(cls):
-        if cls._wiki_es is None:
-            from app import settings
-
-            wiki_es = settings.get('WIKI_ES')
-            wiki_es_max_retries = settings.get('WIKI_ES_MAX_RETRIES')
-            wiki_es_timeout = settings.get('WIKI_ES_TIMEOUT')
-
-            if wiki_es is None:
-                raise WikiUndefinedException
-            else:
-                cls._wiki_es = Elasticsearch(
-                    wiki_es,
-                    max_retries=wiki_es_max_retries,
-                    timeout=wiki_es_timeout
-                )
+    def get_wiki_es(cls):
+        from app import settings
+        if settings.get('WIKI_ES') is None:
+            raise WikiUndefinedException
+        return get_elasticsearch(WIKI_CLUSTER, settings)
 
     @classmethod
     def get_wiki_info(cls, wikidata_id, lang, wiki_index):
-        cls.init_wiki_es()
+        from app import settings
+        wiki_es = cls.get_wiki_es()
 
         try:
             with prometheus.wiki_request_duration("wiki_es", "get_wiki_info"):
-                resp = cls._wiki_es.search(
+                resp = wiki_es.search(
                     index=wiki_index,
                     body={
                         "filter": {
@@ -319,7 +314,8 @@ class WikidataConnector:
                                 "wikibase_item": wikidata_id
                             }
                         }
-                    }
+                    },
+                    request_timeout=get_timeout(float(settings['WIKI_ES_TIMEOUT']))
                 ).get('hits', {}).get('hits', [])
         except ConnectionError:
             logger.warning("Wiki ES not available: connection exception raised", exc_info=True)
@@ -351,6 +347,7 @@ class SizeLimiter:
 
 class WikipediaBlock(BaseBlock):
     BLOCK_TYPE = "wikipedia"
+    TRIGGER_KEYS = ['wikidata', 'wikipedia']
 
     url = validators.String()
     title = validators.String()
@@ -360,12 +357,25 @@ class WikipediaBlock(BaseBlock):
 
     @classmethod
     def from_es(cls, es_poi, lang):
+        """
+        The block is optional: it is left out
+        once the time of the request is spent.
+        """
+        try:
+            return cls.fetch_from_es(es_poi, lang)
+        except DeadlineExceeded:
+            prometheus.exception("DeadlineExceeded")
+            logger.info("No time left to build the wikipedia block", exc_info=True)
+            return None
+
+    @classmethod
+    def fetch_from_es(cls, es_poi, lang):
         """
         If "wikidata_id" is present and "lang" is in "ES_WIKI_LANG",
         then we try to fetch our "WIKI_ES" (if WIKI_ES has been defined),
         else then we fetch the wikipedia API.
         """
-        wikidata_id = es_poi.get("properties", {}).get("wikidata")
+        wikidata_id = get_properties(es_poi).get("wikidata")
         if wikidata_id is not None:
             wiki_index = WikidataConnector.get_wiki_index(lang)
             if wiki_index is not None:
@@ -389,7 +399,7 @@ class WikipediaBlock(BaseBlock):
                 except WikiUndefinedException:
                     logger.info("WIKI_ES variable has not been set: call to Wikipedia")
 
-        wikipedia_value = es_poi.get("properties", {}).get("wikipedia")
+        wikipedia_value = get_properties(es_poi).get("wikipedia")
         wiki_title = None
 
         if wikipedia_value:
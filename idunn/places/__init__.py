@@ -3,3 +3,6 @@ from .admin import Admin
 from .poi import POI
 from .street import Street
 from .place import Place
+
+ALL_PLACES = [Admin, Street, Address, POI]
+PLACE_TYPE_TO_CLASS = {p.PLACE_TYPE: p for p in ALL_PLACES}
@@ -1,8 +1,11 @@
-from .place import Place
+from .place import Place, STREET_SOURCE_FIELDS, prefix_fields
 from idunn.api.utils import build_blocks, get_geom
 
 class Address(Place):
     PLACE_TYPE = 'address'
+    SOURCE_FIELDS = ['id', 'name', 'label', 'house_number', 'zip_codes', 'coord', 'bbox'] \
+        + prefix_fields('street', STREET_SOURCE_FIELDS)
+    ADMINS_PATH = 'street.administrative_regions'
 
     @staticmethod
     def get_raw_address(es_place):
@@ -13,8 +16,8 @@ class Address(Place):
         return cls.get_raw_street(es_place).get("administrative_regions") or []
 
     @classmethod
-    def load_place(cls, es_place, lang, settings, verbosity):
-        address_addr = cls.build_address(es_place)
+    def load_place(cls, es_place, lang, settings, verbosity, block_types=None):
+        address_addr = cls.load_address(es_place, verbosity)
 
         return cls(
             id=es_place.get('id', ''),
@@ -24,5 +27,5 @@ class Address(Place):
             subclass_name='address',
             geometry=get_geom(es_place),
             address=address_addr,
-            blocks=build_blocks(es_place, lang, verbosity)
+            blocks=build_blocks(es_place, lang, verbosity, block_types)
         )
@@ -3,6 +3,8 @@ from idunn.api.utils import build_blocks, get_geom
 
 class Admin(Place):
     PLACE_TYPE = 'admin'
+    SOURCE_FIELDS = ['id', 'name', 'label', 'zone_type', 'zip_codes', 'coord', 'bbox']
+    LIST_SOURCE_FIELDS = ['id', 'name', 'zone_type', 'coord']
 
     @classmethod
     def build_admin(cls, es_place):
@@ -15,8 +17,8 @@ class Admin(Place):
         return es_place.get("zip_codes")
 
     @classmethod
-    def load_place(cls, es_place, lang, settings, verbosity):
-        admin_addr = cls.build_address(es_place)
+    def load_place(cls, es_place, lang, settings, verbosity, block_types=None):
+        admin_addr = cls.load_address(es_place, verbosity)
 
         return cls(
             id=es_place.get('id', ''),
@@ -26,5 +28,5 @@ class Admin(Place):
             subclass_name=es_place.get('zone_type'),
             geometry=get_geom(es_place),
             address=admin_addr,
-            blocks=build_blocks(es_place, lang, verbosity)
+            blocks=build_blocks(es_place, lang, verbosity, block_types)
         )
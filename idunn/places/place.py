@@ -1,9 +1,24 @@
 from apistar import types, validators
-from idunn.blocks.base import BlocksValidator
-from idunn.api.utils import LONG, BLOCKS_BY_VERBOSITY
+from idunn.blocks.base import BlocksValidator, PartialBlockList, replace_fields, set_trusted_fields
+from idunn.api.utils import LONG, LIST, BLOCKS_BY_VERBOSITY
+from idunn.utils.admin_cache import AdminCache
+
+ADMIN_SOURCE_FIELDS = ['id', 'label', 'name', 'level', 'zip_codes']
+STREET_SOURCE_FIELDS = ['id', 'name', 'label', 'zip_codes']
+
+def prefix_fields(prefix, fields):
+    """
+    >>> prefix_fields('address', ['id', 'name'])
+    ['address.id', 'address.name']
+    """
+    return [f'{prefix}.{f}' for f in fields]
 
 class Place(types.Type):
     PLACE_TYPE = ''
+    SOURCE_FIELDS = [] # Fields of the ES document read to build the place (without its blocks)
+    LIST_SOURCE_FIELDS = ['id', 'name', 'coord'] # Same, for the list verbosity (without the address)
+    SOURCE_EXCLUDES = ['boundary', '*.boundary'] # The admin boundaries are never used
+    ADMINS_PATH = None # Path of the admins rendered in the address, in the ES document
 
     type = validators.String()
     id = validators.String(allow_null=True)
@@ -15,6 +30,8 @@ class Place(types.Type):
     address = validators.Object(allow_null=True)
     blocks = BlocksValidator(allowed_blocks=BLOCKS_BY_VERBOSITY.get(LONG))
 
+    partial = False # True if some blocks were not built in time
+
     def __init__(self, *args, **kwargs):
         if not args:
             if not self.PLACE_TYPE:
@@ -23,27 +40,96 @@ class Place(types.Type):
                     self.__class__.__name__
                 )
             kwargs['type'] = self.PLACE_TYPE
-        super().__init__(*args, **kwargs)
+        if args or not set_trusted_fields(self, kwargs):
+            super().__init__(*args, **kwargs)
+        if isinstance(kwargs.get('blocks'), PartialBlockList):
+            # Not a field: "partial" is never validated nor serialized
+            object.__setattr__(self, 'partial', True)
 
     @classmethod
-    def load_place(cls, es_place, lang, settings, verbosity):
+    def load_place(cls, es_place, lang, settings, verbosity, block_types=None):
         raise NotImplementedError
 
+    def get_cache_ttl(self, max_ttl):
+        """
+        Returns how long (in seconds) the place can be cached: until
+        the next transition of its opening hours, and at most max_ttl.
+        A partial place is not cached.
+        """
+        if self.partial:
+            return 0
+        ttl = max_ttl
+        for block in self.blocks:
+            seconds = block.get('seconds_before_next_transition')
+            if seconds is not None:
+                ttl = min(ttl, seconds)
+        return ttl
+
+    def with_elapsed_time(self, elapsed):
+        """
+        Returns a copy of the place, with the countdowns to the next
+        opening hours transitions decreased by the elapsed seconds.
+        """
+        blocks = []
+        for block in self.blocks:
+            seconds = block.get('seconds_before_next_transition')
+            if seconds is not None:
+                block = replace_fields(block, seconds_before_next_transition=seconds - elapsed)
+            blocks.append(block)
+        return replace_fields(self, blocks=blocks)
+
+    @classmethod
+    def get_source_fields(cls, verbosity, full_admins=False):
+        """
+        Returns the fields of the ES document required to build
+        the place and its blocks for the given verbosity.
+
+        Only the ids of the admins are required while the AdminCache
+        is warm, unless full_admins is set.
+        """
+        if verbosity == LIST:
+            fields = set(cls.LIST_SOURCE_FIELDS)
+        else:
+            fields = set(cls.SOURCE_FIELDS)
+        if cls.ADMINS_PATH and verbosity != LIST:
+            admin_fields = ADMIN_SOURCE_FIELDS
+            if not full_admins and AdminCache.is_warm():
+                admin_fields = ['id']
+            fields.update(prefix_fields(cls.ADMINS_PATH, admin_fields))
+        for block in BLOCKS_BY_VERBOSITY.get(verbosity):
+            fields.update(block.get_source_fields())
+        return sorted(fields)
+
+    @staticmethod
+    def build_admin_entry(raw_admin):
+        return {
+            "id": raw_admin.get("id"),
+            "label": raw_admin.get("label"),
+            "name": raw_admin.get("name"),
+            "class_name": raw_admin.get("level"),
+            "postcodes": raw_admin.get("zip_codes")
+        }
+
     @classmethod
     def build_admins(cls, raw_admins):
+        """
+        The entries are shared with the AdminCache: they must not be modified
+        """
         admins = []
         if not raw_admins is None:
             for raw_admin in raw_admins:
-                admin = {
-                    "id": raw_admin.get("id"),
-                    "label": raw_admin.get("label"),
-                    "name": raw_admin.get("name"),
-                    "class_name": raw_admin.get("level"),
-                    "postcodes": raw_admin.get("zip_codes")
-                }
-                admins.append(admin)
+                admins.append(AdminCache.get_entry(raw_admin, cls.build_admin_entry))
         return admins
 
+    @classmethod
+    def load_address(cls, es_place, verbosity):
+        """
+        The address is not built for the list verbosity (map markers)
+        """
+        if verbosity == LIST:
+            return None
+        return cls.build_address(es_place)
+
     @classmethod
     def build_street(cls, raw_street):
         return {
@@ -1,20 +1,27 @@
-from .place import Place
+from .place import Place, STREET_SOURCE_FIELDS, prefix_fields
 from idunn.api.utils import build_blocks, get_geom, get_name
+from idunn.utils.properties import get_properties
 
 class POI(Place):
     PLACE_TYPE = 'poi'
+    SOURCE_FIELDS = ['id', 'properties', 'coord', 'bbox'] \
+        + prefix_fields('address', ['id', 'name', 'label', 'house_number', 'zip_codes']) \
+        + prefix_fields('address.street', STREET_SOURCE_FIELDS)
+    LIST_SOURCE_FIELDS = ['id', 'properties', 'coord']
+    ADMINS_PATH = 'administrative_regions'
 
     @classmethod
-    def load_place(cls, es_place, lang, settings, verbosity):
-        properties = {p.get('key'): p.get('value') for p in es_place.get('properties')}
-        es_place['properties'] = properties
-        return cls.load_poi(es_place, lang, verbosity)
+    def load_place(cls, es_place, lang, settings, verbosity, block_types=None):
+        # The ES document is not modified since it may be shared by the MimirCache:
+        # its blocks share a read-only view over its properties
+        es_place = dict(es_place, properties=get_properties(es_place))
+        return cls.load_poi(es_place, lang, verbosity, block_types)
 
     @classmethod
-    def load_poi(cls, es_poi, lang, verbosity):
-        poi_addr = cls.build_address(es_poi)
+    def load_poi(cls, es_poi, lang, verbosity, block_types=None):
+        poi_addr = cls.load_address(es_poi, verbosity)
 
-        properties = es_poi.get('properties', {})
+        properties = get_properties(es_poi)
         admins = es_poi.get('administrative_regions', None)
 
         return cls(
@@ -25,5 +32,5 @@ class POI(Place):
             subclass_name=properties.get('poi_subclass'),
             geometry=get_geom(es_poi),
             address=poi_addr,
-            blocks=build_blocks(es_poi, lang, verbosity)
+            blocks=build_blocks(es_poi, lang, verbosity, block_types)
         )
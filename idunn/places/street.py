@@ -1,8 +1,10 @@
-from .place import Place
+from .place import Place, STREET_SOURCE_FIELDS, prefix_fields
 from idunn.api.utils import build_blocks, get_geom
 
 class Street(Place):
     PLACE_TYPE = 'street'
+    SOURCE_FIELDS = STREET_SOURCE_FIELDS + ['coord', 'bbox']
+    ADMINS_PATH = 'administrative_regions'
 
     @classmethod
     def get_raw_street(cls, es_place):
@@ -13,8 +15,8 @@ class Street(Place):
         return es_place.get("zip_codes")
 
     @classmethod
-    def load_place(cls, es_place, lang, settings, verbosity):
-        street_addr = cls.build_address(es_place)
+    def load_place(cls, es_place, lang, settings, verbosity, block_types=None):
+        street_addr = cls.load_address(es_place, verbosity)
 
         return cls(
             id=es_place.get('id', ''),
@@ -24,5 +26,5 @@ class Street(Place):
             subclass_name='street',
             geometry=get_geom(es_place),
             address=street_addr,
-            blocks=build_blocks(es_place, lang, verbosity)
+            blocks=build_blocks(es_place, lang, verbosity, block_types)
         )
@@ -0,0 +1,117 @@
+from .lru_cache import LruCache
+from .mimir_cache import MimirCache
+
+DISABLED_STATE = object() # Used to flag the cache as disabled by settings
+HIT_RATIO_WEIGHT = 0.01 # Weight of each lookup in the hit ratio: about the last hundred admins
+
+
+class AdminNotCached(Exception):
+    pass
+
+
+class AdminCache:
+    """
+    In-process cache of the rendered admins (the entries of "address.admins")
+
+    The POIs, streets and addresses of a city share the same admins:
+    each admin is rendered once, and the same entry is then reused by
+    all the places. While the cache is warm (its hit ratio is at least
+    ADMIN_CACHE_WARM_HIT_RATIO), only the ids of the admins are fetched
+    with the places. Otherwise, the places are fetched with their admins,
+    which fill the cache.
+
+    The admins fetched with only their ids are resolved from the cache
+    when the places are fetched (see AdminCache.resolve), as the entries
+    may be evicted before the places are loaded.
+
+    The entries are keyed by the mimir indices checked by the MimirCache,
+    so that they are renewed after a reindexation.
+    """
+    _cache = None
+    _warm_hit_ratio = None
+    _hit_ratio = 0.
+
+    @classmethod
+    def init_cache(cls):
+        from app import settings
+        size = int(settings['ADMIN_CACHE_SIZE'])
+        cls._warm_hit_ratio = float(settings['ADMIN_CACHE_WARM_HIT_RATIO'])
+        cls._hit_ratio = 0.
+        if size <= 0:
+            cls._cache = DISABLED_STATE
+        else:
+            cls._cache = LruCache('admin', maxsize=size, ttl=int(settings['ADMIN_CACHE_TTL']))
+
+    @classmethod
+    def get_cache(cls):
+        if cls._cache is None:
+            cls.init_cache()
+        return cls._cache
+
+    @classmethod
+    def is_enabled(cls):
+        return cls.get_cache() is not DISABLED_STATE
+
+    @classmethod
+    def is_warm(cls):
+        """
+        Returns True if the admins of the places are likely to be in the cache
+        """
+        return cls.is_enabled() and cls._hit_ratio >= cls._warm_hit_ratio
+
+    @classmethod
+    def clear(cls):
+        if cls._cache is not None and cls._cache is not DISABLED_STATE:
+            cls._cache.clear()
+        cls._hit_ratio = 0.
+
+    @staticmethod
+    def get_key(admin_id):
+        return (tuple(MimirCache.get_generation() or ()), admin_id)
+
+    @staticmethod
+    def is_complete(raw_admin):
+        """
+        Returns False if only the id of the admin was fetched
+        """
+        return any(key != 'id' for key in raw_admin)
+
+    @classmethod
+    def resolve(cls, raw_admin):
+        """
+        Returns the admin with its fields, taken from the cache
+        if only its id was fetched, or None if it is not in the cache
+        """
+        if cls.is_complete(raw_admin):
+            return raw_admin
+        cache = cls.get_cache()
+        if cache is DISABLED_STATE:
+            return None
+        cached = cache.get(cls.get_key(raw_admin.get('id')))
+        if cached is None:
+            return None
+        return cached[0]
+
+    @classmethod
+    def get_entry(cls, raw_admin, render):
+        """
+        Returns the cached entry of the admin, or renders it
+        with render(raw_admin) and caches it.
+
+        The admins fetched without their fields must have been
+        resolved first: they are never rendered.
+        """
+        cache = cls.get_cache()
+        if cache is not DISABLED_STATE:
+            key = cls.get_key(raw_admin.get('id'))
+            cached = cache.get(key)
+            cls._hit_ratio += ((cached is not None) - cls._hit_ratio) * HIT_RATIO_WEIGHT
+            if cached is not None:
+                return cached[1]
+
+        if not cls.is_complete(raw_admin):
+            raise AdminNotCached('admin %s was fetched without its fields' % raw_admin.get('id'))
+        entry = render(raw_admin)
+        if cache is not DISABLED_STATE:
+            cache.set(key, (raw_admin, entry))
+        return entry
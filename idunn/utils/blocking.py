@@ -0,0 +1,86 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BlockingExecutor:
+    """
+    Thread pool used by the async app to run the blocking calls
+    (to ES, Redis or Wikipedia) without blocking the event loop.
+    Its size is the max number of such calls in progress in the process.
+    """
+    _executor = None
+
+    @classmethod
+    def get_executor(cls):
+        if cls._executor is None:
+            from app import settings
+            cls._executor = ThreadPoolExecutor(
+                max_workers=int(settings['ASYNC_MAX_BLOCKING_CALLS'])
+            )
+        return cls._executor
+
+
+class BlocksExecutor:
+    """
+    Thread pool used to build the blocks of a place concurrently
+    """
+    _executor = None
+
+    @classmethod
+    def get_executor(cls):
+        if cls._executor is None:
+            from app import settings
+            cls._executor = ThreadPoolExecutor(
+                max_workers=int(settings['BLOCKS_MAX_WORKERS'])
+            )
+        return cls._executor
+
+
+async def run_blocking(f, *args, **kwargs):
+    """
+    Runs the blocking function f in the BlockingExecutor and waits for its result
+    """
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(
+        BlockingExecutor.get_executor(),
+        functools.partial(f, *args, **kwargs)
+    )
+
+
+def run_sync(coroutine):
+    """
+    Runs a coroutine that awaits only synchronous calls (see sync_call),
+    without an event loop, and returns its result
+
+    >>> async def add(a, b):
+    ...     return await sync_call(sum)([a, b])
+    >>> run_sync(add(1, 2))
+    3
+    """
+    try:
+        coroutine.send(None)
+    except StopIteration as e:
+        return e.value
+    coroutine.close()
+    raise RuntimeError('the coroutine is waiting for an event loop')
+
+
+def sync_call(f):
+    """
+    Returns a coroutine function that calls f directly,
+    for the code shared by the sync and async handlers
+    """
+    async def call(*args, **kwargs):
+        return f(*args, **kwargs)
+    return call
+
+
+def blocking_call(f, deadline):
+    """
+    Returns a coroutine function that runs f in the BlockingExecutor
+    with the deadline of the request
+    """
+    async def call(*args, **kwargs):
+        return await run_blocking(deadline.wrap(f), *args, **kwargs)
+    return call
@@ -0,0 +1,102 @@
+import zlib
+from apistar import http
+from .settings import Settings
+from . import prometheus
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP = 'gzip'
+BROTLI = 'br'
+
+COMPRESSIBLE_MEDIA_TYPES = ['application/json', 'application/vnd.oai.openapi', 'text/']
+
+
+def parse_accept_encoding(header_value) -> dict:
+    """
+    Returns the quality of each encoding accepted by the client
+
+    >>> parse_accept_encoding('gzip, deflate;q=0.5, br;q=0')
+    {'gzip': 1.0, 'deflate': 0.5, 'br': 0.0}
+    """
+    encodings = {}
+    for item in header_value.split(','):
+        name, _, params = item.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.
+        encodings[name] = quality
+    return encodings
+
+
+def choose_encoding(header_value):
+    """
+    Returns the best encoding accepted by the client, or None
+
+    Brotli is preferred when its library is installed.
+
+    >>> choose_encoding('gzip, deflate')
+    'gzip'
+    >>> choose_encoding('gzip;q=0, identity') is None
+    True
+    """
+    encodings = parse_accept_encoding(header_value)
+    available = [BROTLI, GZIP] if brotli is not None else [GZIP]
+    for encoding in available:
+        if encodings.get(encoding, encodings.get('*', 0.)) > 0:
+            return encoding
+    return None
+
+
+def compress(content, encoding, settings) -> bytes:
+    if encoding == BROTLI:
+        return brotli.compress(content, quality=int(settings['COMPRESSION_BROTLI_LEVEL']))
+    # Unlike gzip.compress, no timestamp is written in the header:
+    # the same content is always compressed the same way
+    compressor = zlib.compressobj(int(settings['COMPRESSION_GZIP_LEVEL']), zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(content) + compressor.flush()
+
+
+def is_compressible(response):
+    content_type = response.headers.get('Content-Type', '')
+    return any(content_type.startswith(t) for t in COMPRESSIBLE_MEDIA_TYPES)
+
+
+class CompressionHook:
+    """
+    Compresses the JSON responses with the encoding negotiated from
+    the "Accept-Encoding" header of the request.
+
+    The responses smaller than COMPRESSION_MIN_SIZE bytes are not compressed:
+    the gain would not be worth the time spent.
+    """
+
+    def on_response(self, response: http.Response, headers: http.Headers, settings: Settings):
+        if response is None or not is_compressible(response):
+            return
+        if 'Content-Encoding' in response.headers:
+            return
+        response.headers['Vary'] = 'Accept-Encoding'
+
+        min_size = int(settings['COMPRESSION_MIN_SIZE'])
+        if min_size < 0 or len(response.content) < min_size:
+            return
+
+        encoding = choose_encoding(headers.get('accept-encoding', ''))
+        if encoding is None:
+            return
+
+        content = compress(response.content, encoding, settings)
+        prometheus.compression_saved_bytes(encoding, len(response.content) - len(content))
+        response.content = content
+        response.headers['Content-Encoding'] = encoding
+        response.headers['Content-Length'] = str(len(content))
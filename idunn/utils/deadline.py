@@ -0,0 +1,143 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from inspect import Parameter
+from apistar import Component, http
+from apistar.exceptions import HTTPException
+from .settings import Settings
+
+logger = logging.getLogger(__name__)
+
+REQUEST_TIMEOUT_HEADER = 'x-request-timeout'
+
+_local = threading.local()
+
+
+class DeadlineExceeded(HTTPException):
+    default_status_code = 504
+    default_detail = {"message": "the request could not be answered in time"}
+
+
+class Deadline:
+    """
+    Time at which a request must be answered
+
+    The timeouts of the calls to ES, Redis and Wikipedia are derived
+    from the time remaining before the deadline.
+
+    >>> deadline = Deadline(10)
+    >>> 9 < deadline.remaining() <= 10
+    True
+    >>> Deadline(0).expired()
+    True
+    """
+
+    def __init__(self, timeout):
+        self.expires_at = time.monotonic() + timeout
+
+    def remaining(self):
+        return max(self.expires_at - time.monotonic(), 0.)
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    @contextmanager
+    def activate(self):
+        """
+        Sets the deadline as the current deadline of the thread
+        """
+        previous = get_current_deadline()
+        _local.deadline = self
+        try:
+            yield self
+        finally:
+            _local.deadline = previous
+
+    def wrap(self, f):
+        """
+        Returns a function that runs f with the deadline activated,
+        to be run in another thread
+        """
+        def with_deadline(*args, **kwargs):
+            with self.activate():
+                return f(*args, **kwargs)
+        return with_deadline
+
+
+def get_current_deadline():
+    return getattr(_local, 'deadline', None)
+
+
+def clear_current_deadline():
+    _local.deadline = None
+
+
+def check_deadline():
+    """
+    Raises DeadlineExceeded if there is no time left for the current request
+    """
+    deadline = get_current_deadline()
+    if deadline is not None and deadline.expired():
+        raise DeadlineExceeded
+
+
+def get_timeout(default=None):
+    """
+    Returns the timeout of an outbound call: the default timeout
+    capped by the time left for the current request.
+    Raises DeadlineExceeded if there is no time left.
+
+    >>> get_timeout(1.)
+    1.0
+    >>> with Deadline(0.5).activate():
+    ...     get_timeout(1.) <= 0.5
+    True
+    """
+    deadline = get_current_deadline()
+    if deadline is None:
+        return default
+    remaining = deadline.remaining()
+    if remaining <= 0:
+        raise DeadlineExceeded
+    if default is None:
+        return remaining
+    return min(default, remaining)
+
+
+class DeadlineComponent(Component):
+    """
+    The deadline of a request is REQUEST_TIMEOUT seconds after it is received.
+    A client can shorten it with the "X-Request-Timeout" header (in seconds).
+    """
+
+    def can_handle_parameter(self, parameter: Parameter) -> bool:
+        return parameter.annotation is Deadline
+
+    def resolve(self, settings: Settings, headers: http.Headers) -> Deadline:
+        timeout = float(settings['REQUEST_TIMEOUT'])
+        header_value = headers.get(REQUEST_TIMEOUT_HEADER)
+        if header_value:
+            try:
+                timeout = min(timeout, float(header_value))
+            except ValueError:
+                logger.info("Invalid %s header: %s", REQUEST_TIMEOUT_HEADER, header_value)
+        return Deadline(timeout)
+
+
+class DeadlineHook:
+    """
+    Activates the deadline of the request in the thread that handles it.
+
+    Only used by the sync app: the handlers of the async app
+    pass the deadline to the threads running their blocking calls.
+    """
+
+    def on_request(self, deadline: Deadline):
+        _local.deadline = deadline
+
+    def on_response(self):
+        clear_current_deadline()
+
+    def on_error(self):
+        clear_current_deadline()
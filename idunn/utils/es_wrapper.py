@@ -1,22 +1,142 @@
+import os
+import socket
+import threading
 from inspect import Parameter
 from apistar import Component
-from elasticsearch import Elasticsearch
+from elasticsearch import Elasticsearch, Transport, Urllib3HttpConnection
+from . import prometheus
+from .json_codec import ElasticsearchSerializer
 from .settings import Settings
 
+MIMIR_CLUSTER = 'MIMIR'
+WIKI_CLUSTER = 'WIKI'
+
+_clients = {}
+_clients_pid = None
+_clients_lock = threading.Lock()
+
+
+class KeepAliveConnection(Urllib3HttpConnection):
+    """
+    Connection whose sockets send TCP keep-alive probes, so that the idle
+    connections of the pool are not silently dropped by the network.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # The sockets are created lazily by the urllib3 pool, with these options
+        self.pool.conn_kw['socket_options'] = [
+            (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+            (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+        ]
+
+
+class MonitoredTransport(Transport):
+    """
+    Transport exporting the stats of its connection pools after each request
+    """
+    cluster_name = None
+
+    def perform_request(self, *args, **kwargs):
+        try:
+            return super().perform_request(*args, **kwargs)
+        finally:
+            self.export_pool_stats()
+
+    def get_pool_stats(self):
+        """
+        Returns the number of connections in use, idle, created and
+        discarded (closed since the pool was full or the connection broken),
+        summed over the nodes of the cluster.
+        """
+        stats = dict.fromkeys(['in_use', 'idle', 'created', 'discarded'], 0)
+        for connection in self.connection_pool.connections:
+            pool = getattr(connection, 'pool', None)
+            if pool is None or pool.pool is None:
+                continue
+            # The queue of the pool holds the idle connections,
+            # and None for each connection that can still be created
+            with pool.pool.mutex:
+                idle = sum(1 for c in pool.pool.queue if c is not None)
+            in_use = pool.pool.maxsize - pool.pool.qsize()
+            stats['in_use'] += in_use
+            stats['idle'] += idle
+            stats['created'] += pool.num_connections
+            stats['discarded'] += max(pool.num_connections - in_use - idle, 0)
+        return stats
+
+    def export_pool_stats(self):
+        if self.cluster_name is not None:
+            prometheus.es_pool_stats(self.cluster_name, self.get_pool_stats())
+
+
+def make_client(cluster, settings) -> Elasticsearch:
+    """
+    Creates the client of the cluster ('MIMIR' or 'WIKI'),
+    configured by the {cluster}_ES_* settings
+    """
+    sniffer_timeout = float(settings[f'{cluster}_ES_SNIFFER_TIMEOUT'])
+    client = Elasticsearch(
+        settings[f'{cluster}_ES'],
+        transport_class=MonitoredTransport,
+        serializer=ElasticsearchSerializer(),
+        connection_class=KeepAliveConnection if settings[f'{cluster}_ES_TCP_KEEPALIVE'] else Urllib3HttpConnection,
+        maxsize=int(settings[f'{cluster}_ES_MAX_CONNECTIONS']),
+        timeout=float(settings[f'{cluster}_ES_TIMEOUT']),
+        max_retries=int(settings[f'{cluster}_ES_MAX_RETRIES']),
+        sniff_on_start=bool(settings[f'{cluster}_ES_SNIFF_ON_START']),
+        sniffer_timeout=sniffer_timeout if sniffer_timeout > 0 else None,
+        sniff_on_connection_fail=sniffer_timeout > 0,
+    )
+    client.transport.cluster_name = cluster.lower()
+    return client
 
-class ElasticSearchComponent(Component):
 
-    def __init__(self) -> None:
-        self._es = None
+def get_elasticsearch(cluster, settings) -> Elasticsearch:
+    """
+    Returns the client of the cluster, created lazily in each process.
+
+    With gunicorn --preload, a client created in the master process
+    before the fork is never used by the workers: they would share its sockets.
+    """
+    url = settings[f'{cluster}_ES']
+    with _clients_lock:
+        if _clients_pid != os.getpid():
+            reset_clients()
+        client = _clients.get((cluster, url))
+        if client is None:
+            client = make_client(cluster, settings)
+            _clients[(cluster, url)] = client
+        return client
+
+
+def reset_clients():
+    """
+    Forgets the clients of the parent process, without closing their sockets
+    (that are still used by the parent)
+    """
+    global _clients_pid
+    _clients.clear()
+    _clients_pid = os.getpid()
+
+
+def _after_fork_in_child():
+    global _clients_lock
+    # The lock may have been held by another thread of the parent
+    _clients_lock = threading.Lock()
+    reset_clients()
+
+
+if hasattr(os, 'register_at_fork'):
+    # python >= 3.7: the clients are also reset right after a fork
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+class ElasticSearchComponent(Component):
 
     def can_handle_parameter(self, parameter: Parameter) -> bool:
         return parameter.annotation is Elasticsearch
 
     def resolve(self, settings: Settings) -> Elasticsearch:
-        if not self._es:
-            # the client is lazily created for the tests
-            self._make_client(settings)
-        return self._es
-
-    def _make_client(self, settings) -> Elasticsearch:
-        self._es = Elasticsearch(settings['MIMIR_ES'])
+        # the client is lazily created for the tests
+        return get_elasticsearch(MIMIR_CLUSTER, settings)
@@ -1,3 +1,4 @@
+import json
 from inspect import Parameter
 from apistar import Component
 from .settings import Settings
@@ -6,8 +7,38 @@ from elasticsearch import Elasticsearch
 class IndexNames(dict):
     """
         Class to handle the names of the indices from the settings
+
+        It also holds the routing table used to find the type
+        of a place (and then its index) from the prefix of its id.
     """
 
+    def __init__(self, *args, id_prefixes=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.id_prefixes = id_prefixes or {}
+
+    def get_type_from_id(self, id):
+        """
+        Returns the place type corresponding to the prefix of the id,
+        or None if the prefix is unknown.
+
+        >>> indices = IndexNames({'admin': 'munin_admin'}, id_prefixes={'admin': 'admin'})
+        >>> indices.get_type_from_id('admin:osm:relation:123057')
+        'admin'
+
+        >>> indices.get_type_from_id('osm:way:63178753') is None
+        True
+
+        >>> indices.get_type_from_id('35460343') is None
+        True
+        """
+        prefix, sep, _ = id.partition(':')
+        if not sep:
+            return None
+        type = self.id_prefixes.get(prefix)
+        if type not in self:
+            return None
+        return type
+
 class IndexNamesSettingsComponent(Component):
     def __init__(self) -> None:
         self._indices = None
@@ -21,9 +52,12 @@ class IndexNamesSettingsComponent(Component):
         return self._indices
 
     def _make_indices(self, settings) -> IndexNames:
-        self._indices = {
-            "admin": settings['PLACE_ADMIN_INDEX'],
-            "street": settings['PLACE_STREET_INDEX'],
-            "address": settings['PLACE_ADDRESS_INDEX'],
-            "poi": settings['PLACE_POI_INDEX'],
-        }
+        self._indices = IndexNames(
+            {
+                "admin": settings['PLACE_ADMIN_INDEX'],
+                "street": settings['PLACE_STREET_INDEX'],
+                "address": settings['PLACE_ADDRESS_INDEX'],
+                "poi": settings['PLACE_POI_INDEX'],
+            },
+            id_prefixes=json.loads(settings['PLACE_ID_PREFIXES'])
+        )
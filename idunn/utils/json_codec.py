@@ -0,0 +1,130 @@
+import json
+import logging
+from elasticsearch.serializer import JSONSerializer
+from elasticsearch.exceptions import SerializationError
+
+logger = logging.getLogger(__name__)
+
+AUTO_BACKEND = 'auto'
+BACKENDS = ['orjson', 'ujson', 'json'] # by order of preference
+
+
+class JsonBackend:
+    """
+    A JSON library: "loads" accepts str or bytes, "dumps" returns str
+    and "dumpb" returns bytes (compact and UTF-8 encoded)
+    """
+
+    def __init__(self, name, loads, dumps, dumpb=None):
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+        self.dumpb = dumpb or (lambda obj: dumps(obj).encode('utf-8'))
+
+
+def load_backend(name) -> JsonBackend:
+    """
+    Returns the backend with the given name,
+    or raises ImportError if its library is not installed
+
+    >>> load_backend('json').dumps({'name': 'Musée du Louvre', 'url': 'https://www.louvre.fr'})
+    '{"name":"Musée du Louvre","url":"https://www.louvre.fr"}'
+    """
+    if name == 'orjson':
+        import orjson
+        return JsonBackend(name, orjson.loads, lambda obj: orjson.dumps(obj).decode('utf-8'), orjson.dumps)
+    if name == 'ujson':
+        import ujson
+        return JsonBackend(
+            name,
+            ujson.loads,
+            lambda obj: ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False)
+        )
+    if name == 'json':
+        return JsonBackend(
+            name,
+            json.loads,
+            lambda obj: json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+        )
+    raise ValueError(f'Unknown JSON backend: {name}')
+
+
+def get_available_backends():
+    backends = []
+    for name in BACKENDS:
+        try:
+            backends.append(load_backend(name))
+        except ImportError:
+            pass
+    return backends
+
+
+class JsonCodec:
+    """
+    The JSON backend used to decode the ES responses and the cached values
+
+    The JSON_BACKEND setting is either the name of a backend or "auto",
+    to use the fastest library installed (the stdlib json as a fallback).
+    """
+    _backend = None
+
+    @classmethod
+    def init_backend(cls):
+        from app import settings
+        name = settings['JSON_BACKEND']
+        if name == AUTO_BACKEND:
+            cls._backend = get_available_backends()[0]
+        else:
+            try:
+                cls._backend = load_backend(name)
+            except ImportError:
+                logger.warning("The JSON backend %s is not installed: the stdlib json is used", name)
+                cls._backend = load_backend('json')
+        logger.info("JSON backend: %s", cls._backend.name)
+
+    @classmethod
+    def get_backend(cls) -> JsonBackend:
+        if cls._backend is None:
+            cls.init_backend()
+        return cls._backend
+
+
+def loads(s):
+    return JsonCodec.get_backend().loads(s)
+
+
+def dumps(obj):
+    return JsonCodec.get_backend().dumps(obj)
+
+
+def dumpb(obj):
+    return JsonCodec.get_backend().dumpb(obj)
+
+
+class ElasticsearchSerializer(JSONSerializer):
+    """
+    Serializer of the ES clients using the JsonCodec backend
+
+    The values the backend cannot serialize (dates, decimals...)
+    are left to the default serializer of the ES client.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend
+
+    def get_backend(self):
+        return self.backend or JsonCodec.get_backend()
+
+    def loads(self, s):
+        try:
+            return self.get_backend().loads(s)
+        except (ValueError, TypeError) as e:
+            raise SerializationError(s, e)
+
+    def dumps(self, data):
+        if isinstance(data, str):
+            return data
+        try:
+            return self.get_backend().dumps(data)
+        except (ValueError, TypeError, OverflowError):
+            return super().dumps(data)
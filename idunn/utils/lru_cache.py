@@ -0,0 +1,83 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from idunn.utils import prometheus
+
+
+class LruCache:
+    """
+    Bounded in-process cache, whose entries expire after a TTL
+
+    When the cache is full, the least recently used entry is evicted.
+    Each (gunicorn) worker has its own instance of the cache.
+
+    >>> cache = LruCache('doctest', maxsize=2, ttl=60)
+    >>> cache.set('a', 1)
+    >>> cache.set('b', 2)
+    >>> cache.get('a')
+    1
+    >>> cache.set('c', 3)
+    >>> cache.get('b') is None
+    True
+    >>> sorted(cache.keys())
+    ['a', 'c']
+    """
+
+    def __init__(self, name, maxsize, ttl):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    prometheus.cache_hit(self.name)
+                    return value
+                del self._entries[key]
+        prometheus.cache_miss(self.name)
+        return default
+
+    def set(self, key, value, ttl=None):
+        """
+        Stores the value. The ttl (in seconds) defaults to the ttl of the cache,
+        and is capped by it.
+        """
+        if ttl is None or ttl > self.ttl:
+            ttl = self.ttl
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                prometheus.cache_eviction(self.name)
+
+    def contains(self, key):
+        """
+        Returns True if the key has a valid entry, without counting
+        a hit or a miss nor refreshing the entry
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[1] > time.monotonic()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def keys(self):
+        with self._lock:
+            return list(self._entries.keys())
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,111 @@
+import time
+import logging
+from elasticsearch import TransportError
+
+from .lru_cache import LruCache
+from .deadline import DeadlineExceeded, get_timeout
+
+logger = logging.getLogger(__name__)
+
+DISABLED_STATE = object() # Used to flag the cache as disabled by settings
+
+
+class MimirCache:
+    """
+    In-process cache of the documents fetched from mimir
+
+    Mimir reindexes in new indices and then moves its aliases.
+    So the cache is emptied when the indices behind the aliases change,
+    which is checked at most once every MIMIR_CACHE_ALIAS_CHECK_PERIOD seconds.
+    These indices (the generation) are also tracked while the cache is
+    disabled, since they key the AdminCache.
+    """
+    _cache = None
+    _check_period = None
+    _last_check = None
+    _generation = None
+
+    @classmethod
+    def init_cache(cls):
+        from app import settings
+        size = int(settings['MIMIR_CACHE_SIZE'])
+        if size <= 0:
+            cls._cache = DISABLED_STATE
+        else:
+            cls._cache = LruCache('mimir', maxsize=size, ttl=int(settings['MIMIR_CACHE_TTL']))
+        cls._check_period = int(settings['MIMIR_CACHE_ALIAS_CHECK_PERIOD'])
+        cls._last_check = None
+        cls._generation = None
+
+    @classmethod
+    def get_cache(cls):
+        if cls._cache is None:
+            cls.init_cache()
+        return cls._cache
+
+    @classmethod
+    def clear(cls):
+        if cls._cache is not None and cls._cache is not DISABLED_STATE:
+            cls._cache.clear()
+
+    @classmethod
+    def get_generation(cls):
+        """
+        Returns the names of the mimir indices as last checked, or None
+        """
+        return cls._generation
+
+    @staticmethod
+    def fetch_generation(es, indices):
+        """
+        Returns the names of the concrete indices behind the mimir aliases
+        """
+        aliases = es.indices.get_alias(
+            name=','.join(indices.values()),
+            ignore=404,
+            request_timeout=get_timeout()
+        )
+        return sorted(
+            index for index, value in aliases.items()
+            if isinstance(value, dict) and 'aliases' in value
+        )
+
+    @classmethod
+    def check_generation(cls, es, indices):
+        now = time.monotonic()
+        if cls._last_check is not None and now - cls._last_check < cls._check_period:
+            return
+        cls._last_check = now
+
+        try:
+            generation = cls.fetch_generation(es, indices)
+        except TransportError:
+            logger.warning("Failed to check the mimir aliases", exc_info=True)
+            return
+        except DeadlineExceeded:
+            # The check is done again by the next request
+            cls._last_check = None
+            return
+
+        if cls._generation is not None and generation != cls._generation:
+            logger.info("The mimir indices have changed: the cache is emptied")
+            cls.clear()
+        cls._generation = generation
+
+    @classmethod
+    def get(cls, es, indices, key):
+        """
+        Returns the cached documents, or None if they are not in the cache
+        """
+        cache = cls.get_cache()
+        # The generation also keys the AdminCache: it is checked even if this cache is disabled
+        cls.check_generation(es, indices)
+        if cache is DISABLED_STATE:
+            return None
+        return cache.get(key)
+
+    @classmethod
+    def set(cls, key, value):
+        cache = cls.get_cache()
+        if cache is not DISABLED_STATE:
+            cache.set(key, value)
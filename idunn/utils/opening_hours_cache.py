@@ -0,0 +1,114 @@
+import math
+import time
+import logging
+import humanized_opening_hours as hoh
+from humanized_opening_hours.exceptions import HOHError
+
+from . import prometheus
+from .lru_cache import LruCache
+from .opening_hours_schedule import get_schedule
+
+logger = logging.getLogger(__name__)
+
+DISABLED_STATE = object() # Used to flag the cache as disabled by settings
+PARSE_ERROR = object() # Cached for the fields that cannot be parsed
+
+SOLAR_KEYWORDS = ('sunrise', 'sunset', 'dawn', 'dusk')
+
+
+def uses_solar_hours(raw):
+    """
+    >>> uses_solar_hours('Mo-Su sunrise-sunset')
+    True
+    >>> uses_solar_hours('Mo-Fr 09:00-18:00')
+    False
+    """
+    raw = raw.lower()
+    return any(keyword in raw for keyword in SOLAR_KEYWORDS)
+
+
+class OpeningHoursCache:
+    """
+    In-process cache of the parsed opening_hours fields
+
+    A few thousand distinct fields ("Mo-Fr 09:00-18:00", "24/7"...) cover
+    most of the POIs: each field is parsed (and compiled) once, and its
+    schedule is shared by the POIs. The schedules of the fields with solar
+    hours (sunrise...) are shared by the POIs of a cell of
+    OPENING_HOURS_SOLAR_GRID degrees, with the center of the cell as
+    location. The fields that cannot be parsed are cached too.
+    """
+    _cache = None
+    _solar_grid = None
+
+    @classmethod
+    def init_cache(cls):
+        from app import settings
+        size = int(settings['OPENING_HOURS_CACHE_SIZE'])
+        cls._solar_grid = float(settings['OPENING_HOURS_SOLAR_GRID'])
+        if size <= 0:
+            cls._cache = DISABLED_STATE
+        else:
+            cls._cache = LruCache('opening_hours', maxsize=size, ttl=int(settings['OPENING_HOURS_CACHE_TTL']))
+
+    @classmethod
+    def get_cache(cls):
+        if cls._cache is None:
+            cls.init_cache()
+        return cls._cache
+
+    @classmethod
+    def clear(cls):
+        if cls._cache is not None and cls._cache is not DISABLED_STATE:
+            cls._cache.clear()
+
+    @classmethod
+    def get_location(cls, raw, lat, lon, tzname):
+        """
+        Returns the location given to the parser: the location of the POI,
+        or the center of its cell when the schedule is shared
+        """
+        if not uses_solar_hours(raw) or cls._solar_grid <= 0:
+            return (lat, lon, tzname, 24)
+        grid = cls._solar_grid
+        return (
+            (math.floor(lat / grid) + 0.5) * grid,
+            (math.floor(lon / grid) + 0.5) * grid,
+            tzname,
+            24,
+        )
+
+    @staticmethod
+    def parse(raw, location):
+        """
+        Returns the schedule of the field, or PARSE_ERROR
+        """
+        start = time.perf_counter()
+        try:
+            schedule = get_schedule(hoh.OHParser(raw, location=location))
+        except HOHError:
+            logger.info("Failed to parse OSM opening_hour field", exc_info=True)
+            prometheus.opening_hours_parse_duration('error', time.perf_counter() - start)
+            return PARSE_ERROR
+        prometheus.opening_hours_parse_duration('success', time.perf_counter() - start)
+        return schedule
+
+    @classmethod
+    def get_schedule(cls, raw, lat, lon, tzname):
+        """
+        Returns the (shared) schedule of the opening_hours field,
+        or None if it cannot be parsed
+        """
+        cache = cls.get_cache()
+        location = cls.get_location(raw, lat, lon, tzname)
+        if cache is DISABLED_STATE:
+            schedule = cls.parse(raw, location)
+        else:
+            key = (raw, tzname, location[:2] if uses_solar_hours(raw) else None)
+            schedule = cache.get(key)
+            if schedule is None:
+                schedule = cls.parse(raw, location)
+                cache.set(key, schedule)
+        if schedule is PARSE_ERROR:
+            return None
+        return schedule
@@ -0,0 +1,232 @@
+"""
+    Evaluation of the opening_hours fields
+
+    Most fields only give some opening periods for each day of the week
+    ("Mo-Fr 09:00-12:00,14:00-18:00; Sa 10:00-17:00"). Once parsed by
+    humanized_opening_hours (hoh), their rules are compiled into a sorted
+    array of opening intervals, in minutes since Monday 00:00: the status
+    and the next change are then found by a binary search, and the periods
+    of each day are precomputed.
+
+    The other fields (holidays, months, solar hours, periods spanning over
+    midnight...) are evaluated by hoh.
+"""
+import bisect
+import datetime
+from humanized_opening_hours.exceptions import NextChangeRecursionError
+from humanized_opening_hours.temporal_objects import WEEKDAYS, WeekdayHolidaySelector
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+
+def get_minutes(t):
+    """
+    Returns the minutes since 00:00 of the time
+    of a simple time selector ("24:00" is time.max)
+
+    >>> get_minutes(datetime.time(9, 30))
+    570
+    >>> get_minutes(datetime.time.max)
+    1440
+    """
+    if t == datetime.time.max:
+        return MINUTES_PER_DAY
+    if t.second or t.microsecond:
+        return None
+    return t.hour * 60 + t.minute
+
+
+class ParserSchedule:
+    """
+    Schedule evaluated by the hoh parser of the field
+    """
+
+    def __init__(self, oh):
+        self.parser = oh
+        self.field = oh.field
+        self.week = None # (monday, calendar of the week), see OpeningHourBlock.get_days
+
+    def is_open(self, dt):
+        return self.parser.is_open(dt)
+
+    def next_change(self, dt):
+        return self.parser.next_change(dt=dt)
+
+    def get_periods(self, day):
+        return self.parser.get_day(day).opening_periods()
+
+
+class WeeklySchedule:
+    """
+    Schedule of a simple field, compiled from the rules of its hoh parser
+
+    The datetimes are naive local datetimes, as for the hoh parser,
+    and the results are the same as those of the parser.
+
+    >>> import humanized_opening_hours as hoh
+    >>> schedule = WeeklySchedule.compile(hoh.OHParser('Mo-Fr 09:00-18:00; Sa 10:00-24:00'))
+    >>> schedule.is_open(datetime.datetime(2018, 6, 14, 8, 30))
+    False
+    >>> schedule.next_change(datetime.datetime(2018, 6, 14, 8, 30))
+    datetime.datetime(2018, 6, 14, 9, 0)
+    >>> schedule.next_change(datetime.datetime(2018, 6, 16, 12, 0))
+    datetime.datetime(2018, 6, 16, 23, 59, 59, 999999)
+    >>> WeeklySchedule.compile(hoh.OHParser('Mo-Fr 09:00-18:00; PH off')) is None
+    True
+    """
+
+    def __init__(self, field, day_periods, always_open=False):
+        self.field = field
+        self.always_open = always_open
+        self.week = None # (monday, calendar of the week), see OpeningHourBlock.get_days
+        # Opening periods (in minutes since 00:00) of each day, from Monday
+        self.day_periods = day_periods
+        # Opening intervals of the week (in minutes since Monday 00:00),
+        # the contiguous periods of consecutive days being merged
+        intervals = []
+        for weekday, periods in enumerate(day_periods):
+            for beginning, end in periods:
+                beginning += weekday * MINUTES_PER_DAY
+                end += weekday * MINUTES_PER_DAY
+                if intervals and intervals[-1][1] == beginning:
+                    intervals[-1] = (intervals[-1][0], end)
+                else:
+                    intervals.append((beginning, end))
+        self.starts = [beginning for beginning, _ in intervals]
+        self.ends = [end for _, end in intervals]
+
+    @classmethod
+    def get_rule_periods(cls, rule):
+        """
+        Returns the opening periods of a simple rule
+        (sorted and separated periods, within the day), or None
+        """
+        if rule.status != 'open' or not rule.time_selectors:
+            return None
+        periods = []
+        for timespan in rule.time_selectors:
+            if timespan.beginning.t[0] != 'normal' or timespan.end.t[0] != 'normal':
+                return None
+            beginning = get_minutes(timespan.beginning.t[1])
+            end = get_minutes(timespan.end.t[1])
+            if beginning is None or end is None or beginning >= end:
+                return None
+            if periods and beginning <= periods[-1][1]:
+                return None
+            periods.append((beginning, end))
+        return periods
+
+    @classmethod
+    def get_rule_weekdays(cls, rule):
+        """
+        Returns the weekdays (0 for Monday) selected by a simple rule
+        (None for all the days), or False
+        """
+        selectors = rule.range_selectors.selectors
+        if not selectors:
+            return None
+        if len(selectors) != 1:
+            return False
+        selector = selectors[0]
+        if not isinstance(selector, WeekdayHolidaySelector) or selector.SH or selector.PH:
+            return False
+        return {WEEKDAYS.index(wd) for wd in selector.selectors}
+
+    @classmethod
+    def compile(cls, oh):
+        """
+        Returns the schedule of a hoh parser, or None if its rules are not simple
+        """
+        if oh.is_24_7:
+            return cls(oh.field, [[(0, MINUTES_PER_DAY)]] * 7, always_open=True)
+
+        # The rule of a day is the last of the rules for this weekday,
+        # or else the last of the rules for all the days
+        weekday_rules = [None] * 7
+        default_rule = None
+        for rule in oh.rules:
+            periods = cls.get_rule_periods(rule)
+            weekdays = cls.get_rule_weekdays(rule)
+            if periods is None or weekdays is False:
+                return None
+            if weekdays is None:
+                default_rule = periods
+            else:
+                for weekday in weekdays:
+                    weekday_rules[weekday] = periods
+
+        day_periods = [periods if periods is not None else default_rule for periods in weekday_rules]
+        day_periods = [periods or [] for periods in day_periods]
+        if not any(day_periods):
+            return None
+        return cls(oh.field, day_periods)
+
+    @staticmethod
+    def get_week_start(dt):
+        return datetime.datetime.combine(dt.date() - datetime.timedelta(days=dt.weekday()), datetime.time.min)
+
+    @staticmethod
+    def get_minute_of_week(dt):
+        return dt.weekday() * MINUTES_PER_DAY + dt.hour * 60 + dt.minute
+
+    def find_interval(self, minute):
+        """
+        Returns the index of the last interval starting at or before the minute
+        """
+        return bisect.bisect_right(self.starts, minute) - 1
+
+    def is_open(self, dt):
+        if self.always_open:
+            return True
+        index = self.find_interval(self.get_minute_of_week(dt))
+        return index >= 0 and self.get_minute_of_week(dt) < self.ends[index]
+
+    def next_change(self, dt):
+        week_start = self.get_week_start(dt)
+        minute = self.get_minute_of_week(dt)
+        index = self.find_interval(minute)
+
+        if index >= 0 and minute < self.ends[index]:
+            end = self.ends[index]
+            if end == MINUTES_PER_WEEK and self.starts[0] == 0:
+                # The interval goes on next week
+                if self.ends[0] == MINUTES_PER_WEEK:
+                    raise NextChangeRecursionError(
+                        "The facility is always open.",
+                        week_start + datetime.timedelta(minutes=end) - datetime.timedelta.resolution
+                    )
+                end += self.ends[0]
+            change = week_start + datetime.timedelta(minutes=end)
+            if end % MINUTES_PER_DAY == 0:
+                # hoh closes the days at 23:59:59.999999
+                change -= datetime.timedelta.resolution
+            return change
+
+        if index + 1 < len(self.starts):
+            beginning = self.starts[index + 1]
+        else:
+            beginning = MINUTES_PER_WEEK + self.starts[0]
+        return week_start + datetime.timedelta(minutes=beginning)
+
+    def get_periods(self, day):
+        """
+        Returns the opening periods of the day, as datetimes
+        """
+        periods = []
+        for beginning, end in self.day_periods[day.weekday()]:
+            beginning_dt = datetime.datetime.combine(day, datetime.time.min) + datetime.timedelta(minutes=beginning)
+            if end == MINUTES_PER_DAY:
+                end_dt = datetime.datetime.combine(day, datetime.time.max)
+            else:
+                end_dt = datetime.datetime.combine(day, datetime.time.min) + datetime.timedelta(minutes=end)
+            periods.append((beginning_dt, end_dt))
+        return periods
+
+
+def get_schedule(oh):
+    """
+    Returns the compiled schedule of a hoh parser,
+    or a schedule evaluated by the parser itself
+    """
+    return WeeklySchedule.compile(oh) or ParserSchedule(oh)
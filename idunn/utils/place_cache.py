@@ -0,0 +1,74 @@
+import time
+
+from .lru_cache import LruCache
+
+DISABLED_STATE = object() # Used to flag the cache as disabled by settings
+
+
+class PlaceCache:
+    """
+    In-process cache of the places built by the API
+
+    A place is kept until the next transition of its opening hours,
+    and at most PLACE_CACHE_MAX_TTL seconds, so that the cached
+    open/closed status is always right.
+    """
+    _cache = None
+    _max_ttl = None
+
+    @classmethod
+    def init_cache(cls):
+        from app import settings
+        size = int(settings['PLACE_CACHE_SIZE'])
+        cls._max_ttl = int(settings['PLACE_CACHE_MAX_TTL'])
+        if size <= 0 or cls._max_ttl <= 0:
+            cls._cache = DISABLED_STATE
+        else:
+            cls._cache = LruCache('place', maxsize=size, ttl=cls._max_ttl)
+
+    @classmethod
+    def get_cache(cls):
+        if cls._cache is None:
+            cls.init_cache()
+        return cls._cache
+
+    @classmethod
+    def clear(cls):
+        if cls._cache is not None and cls._cache is not DISABLED_STATE:
+            cls._cache.clear()
+
+    @staticmethod
+    def get_key(id, type, lang, verbosity, block_types=None):
+        return (id, type, lang, verbosity, block_types)
+
+    @classmethod
+    def get(cls, key):
+        """
+        Returns the cached place, or None if it is not in the cache
+        """
+        return cls.get_with_version(key)[0]
+
+    @classmethod
+    def get_with_version(cls, key):
+        """
+        Returns the cached place and the version of the ES document
+        it was built from, or (None, None) if it is not in the cache
+        """
+        cache = cls.get_cache()
+        if cache is DISABLED_STATE:
+            return None, None
+        entry = cache.get(key)
+        if entry is None:
+            return None, None
+        place, stored_at, source_version = entry
+        elapsed = int(time.time() - stored_at)
+        if elapsed > 0:
+            place = place.with_elapsed_time(elapsed)
+        return place, source_version
+
+    @classmethod
+    def set(cls, key, place, source_version=None):
+        cache = cls.get_cache()
+        if cache is DISABLED_STATE or place is None:
+            return
+        cache.set(key, (place, time.time(), source_version), ttl=place.get_cache_ttl(cls._max_ttl))
@@ -20,6 +20,55 @@ IDUNN_WIKI_EXCEPTIONS_COUNT = Counter(
     ["exception_type"]
 )
 
+IDUNN_CACHE_HITS_COUNT = Counter(
+    "idunn_cache_hits_count",
+    "Number of hits in the in-process caches of Idunn.",
+    ["cache"]
+)
+
+IDUNN_CACHE_MISSES_COUNT = Counter(
+    "idunn_cache_misses_count",
+    "Number of misses in the in-process caches of Idunn.",
+    ["cache"]
+)
+
+IDUNN_CACHE_EVICTIONS_COUNT = Counter(
+    "idunn_cache_evictions_count",
+    "Number of entries evicted from the in-process caches of Idunn because they were full.",
+    ["cache"]
+)
+
+IDUNN_BLOCK_TIMEOUTS_COUNT = Counter(
+    "idunn_block_timeouts_count",
+    "Number of blocks left out of a place since they were not built in time.",
+    ["block"]
+)
+
+IDUNN_COMPRESSION_SAVED_BYTES = Counter(
+    "idunn_compression_saved_bytes",
+    "Number of bytes saved by the compression of the responses.",
+    ["encoding"]
+)
+
+IDUNN_TIMEZONE_BORDER_LOOKUPS_COUNT = Counter(
+    "idunn_timezone_border_lookups_count",
+    "Number of timezones looked up in the polygons, since the POI is in a cell on a border.",
+)
+
+IDUNN_OPENING_HOURS_PARSE_DURATION = Histogram(
+    "idunn_opening_hours_parse_duration_seconds",
+    "Time spent parsing the opening_hours fields (on the misses of the opening hours cache).",
+    ["result"],
+    buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25),
+)
+
+IDUNN_ES_POOL_CONNECTIONS = Gauge(
+    "idunn_es_pool_connections",
+    "Number of connections of the pools of the ES clients, by state (in_use, idle, created, discarded).",
+    ["cluster", "state"],
+    multiprocess_mode="livesum"
+)
+
 
 @contextlib.contextmanager
 def wiki_request_duration(target, handler):
@@ -28,3 +77,28 @@ def wiki_request_duration(target, handler):
 
 def exception(exception_type):
     IDUNN_WIKI_EXCEPTIONS_COUNT.labels(exception_type).inc()
+
+def cache_hit(cache_name):
+    IDUNN_CACHE_HITS_COUNT.labels(cache_name).inc()
+
+def cache_miss(cache_name):
+    IDUNN_CACHE_MISSES_COUNT.labels(cache_name).inc()
+
+def cache_eviction(cache_name):
+    IDUNN_CACHE_EVICTIONS_COUNT.labels(cache_name).inc()
+
+def block_timeout(block_type):
+    IDUNN_BLOCK_TIMEOUTS_COUNT.labels(block_type).inc()
+
+def timezone_border_lookup():
+    IDUNN_TIMEZONE_BORDER_LOOKUPS_COUNT.inc()
+
+def opening_hours_parse_duration(result, duration):
+    IDUNN_OPENING_HOURS_PARSE_DURATION.labels(result).observe(duration)
+
+def es_pool_stats(cluster, stats):
+    for state, value in stats.items():
+        IDUNN_ES_POOL_CONNECTIONS.labels(cluster, state).set(value)
+
+def compression_saved_bytes(encoding, saved):
+    IDUNN_COMPRESSION_SAVED_BYTES.labels(encoding).inc(saved)
@@ -0,0 +1,67 @@
+from collections.abc import Mapping
+
+
+class PropertiesView(Mapping):
+    """
+    Read-only mapping over the "properties" of a raw POI,
+    a list of {"key": ..., "value": ...} in the ES documents
+
+    The list is neither copied nor modified, so the raw document can be
+    shared (eg. by the MimirCache). It is indexed on the first lookup.
+
+    >>> properties = PropertiesView([{'key': 'name', 'value': 'Le Louvre'}])
+    >>> properties.get('name')
+    'Le Louvre'
+    >>> properties.get('name:en') is None
+    True
+    >>> dict(properties)
+    {'name': 'Le Louvre'}
+    """
+    __slots__ = ('_raw', '_index')
+
+    def __init__(self, raw_properties):
+        self._raw = raw_properties or []
+        self._index = None
+
+    def _get_index(self):
+        if self._index is None:
+            self._index = {p.get('key'): p.get('value') for p in self._raw}
+        return self._index
+
+    def __getitem__(self, key):
+        return self._get_index()[key]
+
+    def get(self, key, default=None):
+        return self._get_index().get(key, default)
+
+    def __contains__(self, key):
+        return key in self._get_index()
+
+    def __iter__(self):
+        return iter(self._get_index())
+
+    def __len__(self):
+        return len(self._get_index())
+
+    def __repr__(self):
+        return f'PropertiesView({self._raw!r})'
+
+
+def get_properties(es_poi) -> Mapping:
+    """
+    Returns the properties of a raw POI as a mapping
+
+    The properties that are already a mapping (a PropertiesView shared by
+    the blocks of the POI, or a dict) are returned as they are.
+
+    >>> get_properties({'properties': {'wifi': 'yes'}})
+    {'wifi': 'yes'}
+    >>> get_properties({'properties': [{'key': 'wifi', 'value': 'yes'}]}).get('wifi')
+    'yes'
+    >>> len(get_properties({}))
+    0
+    """
+    properties = es_poi.get('properties')
+    if isinstance(properties, Mapping):
+        return properties
+    return PropertiesView(properties)
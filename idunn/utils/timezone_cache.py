@@ -0,0 +1,91 @@
+import math
+from pytz import timezone
+
+from . import prometheus
+from .lru_cache import LruCache
+from .timezone_index import TimezoneFinder
+
+DISABLED_STATE = object() # Used to flag the cache as disabled by settings
+BORDER_CELL = object() # Cached for the cells of the grid that meet the border of a timezone
+
+
+class TimezoneCache:
+    """
+    In-process cache of the timezones of the POIs on the borders
+
+    Most of the POIs get their timezone straight from the grid of the
+    timezone index. In its cells on a border, the point must be looked up
+    in the polygons of the timezones. But most of these POIs are not close
+    to the border itself: the timezones are cached by cell of a finer grid
+    (of TIMEZONE_CACHE_GRID degrees), with a flag for the cells that really
+    meet a border, where each POI is still looked up.
+    """
+    _cache = None
+    _grid = None
+
+    @classmethod
+    def init_cache(cls):
+        from app import settings
+        size = int(settings['TIMEZONE_CACHE_SIZE'])
+        grid = float(settings['TIMEZONE_CACHE_GRID'])
+        if size <= 0 or grid <= 0:
+            cls._cache = DISABLED_STATE
+        else:
+            cls._grid = grid
+            cls._cache = LruCache('timezone', maxsize=size, ttl=int(settings['TIMEZONE_CACHE_TTL']))
+
+    @classmethod
+    def get_cache(cls):
+        if cls._cache is None:
+            cls.init_cache()
+        return cls._cache
+
+    @classmethod
+    def clear(cls):
+        if cls._cache is not None and cls._cache is not DISABLED_STATE:
+            cls._cache.clear()
+
+    @classmethod
+    def get_cell_zone(cls, index, key):
+        """
+        Returns the name of the timezone of all the points of the cell, or BORDER_CELL
+        """
+        mixed_cell, lat, lon = key
+        min_lat, min_lon = lat * cls._grid, lon * cls._grid
+        tzname = index.get_zone_in_box(mixed_cell, min_lat, min_lon, min_lat + cls._grid, min_lon + cls._grid)
+        if tzname is None:
+            return BORDER_CELL
+        return tzname
+
+    @classmethod
+    def get_tz_name(cls, lat, lon):
+        index = TimezoneFinder.get_index()
+        if index is None:
+            return TimezoneFinder.tz_name_at(lat, lon)
+        tzname, mixed_cell = index.locate(lat, lon)
+        if mixed_cell is None:
+            return tzname
+
+        cache = cls.get_cache()
+        if cache is not DISABLED_STATE:
+            key = (mixed_cell, math.floor(lat / cls._grid), math.floor(lon / cls._grid))
+            tzname = cache.get(key)
+            if tzname is None:
+                tzname = cls.get_cell_zone(index, key)
+                cache.set(key, tzname)
+            if tzname is not BORDER_CELL:
+                return tzname
+        prometheus.timezone_border_lookup()
+        return index.refine(mixed_cell, lat, lon)
+
+    @classmethod
+    def get_timezone(cls, lat, lon):
+        """
+        Returns the (pytz) timezone of the point, or None
+        """
+        if lat is None or lon is None:
+            return None
+        tzname = cls.get_tz_name(lat, lon)
+        if tzname is None:
+            return None
+        return timezone(tzname)
@@ -0,0 +1,430 @@
+"""
+    Compact index of the timezones, built from the polygons of tzwhere
+
+    The index is a binary file, memory-mapped by each process: the gunicorn
+    workers share a single copy of it, and it is open in a few milliseconds.
+    It gives the same timezone names as tzwhere.tzNameAt(lat, lon, forceTZ=True):
+
+    - tzwhere looks for the point in the polygons of the zones found in both
+      its 1 degree latitude and longitude bands. The index stores the same
+      candidates for each 1x1 degree cell, and the zone of the cells that
+      have only one candidate (or none) is known without any polygon.
+    - The other cells are divided into SUBDIVISIONS x SUBDIVISIONS subcells.
+      A subcell that is inside a polygon of a zone, and that does not meet
+      the polygons of the other zones, stores this zone.
+    - For the remaining subcells (on the borders), the point is looked up in
+      the candidate polygons with shapely, like tzwhere does, and the polygon
+      nearest to the point is chosen if none contains it.
+
+    Usage (from the root of the repository):
+        python -m idunn.utils.timezone_index build [path]
+"""
+import os
+import sys
+import gzip
+import json
+import math
+import mmap
+import time
+import logging
+import collections
+from array import array
+from functools import lru_cache
+
+import shapely.geometry as geometry
+import shapely.prepared as prepared
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'IDTZ'
+FORMAT_VERSION = 1
+ALIGNMENT = 8
+
+SUBDIVISIONS = 16 # subcells per degree, in the cells on the borders
+NO_ZONE = -1 # Value of the cells without any timezone, and of the subcells to refine
+MIXED_CELL = -2 # The cells below this value are divided into subcells
+
+BOX_MARGIN = 1e-9 # degrees
+
+WORLD_BOUNDS = (-90, -180, 90, 180)
+
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), 'timezones.idx')
+
+
+def get_cell_index(lat, lon):
+    """
+    Returns the position in the grid of the 1x1 degree cell at (lat, lon)
+
+    >>> get_cell_index(-90, -180)
+    0
+    >>> get_cell_index(48, 2)
+    49862
+    """
+    return (lat + 90) * 360 + lon + 180
+
+
+def read_tzwhere_data():
+    """
+    Returns the polygons of each zone and the shortcuts of tzwhere,
+    read from its data files
+    """
+    from tzwhere import tzwhere
+    with gzip.open(tzwhere.tzwhere.DEFAULT_POLYGONS, 'rb') as f:
+        feature_collection = json.loads(f.read().decode('utf-8'))
+    zone_polygons = collections.OrderedDict()
+    for tzname, polygon in tzwhere.feature_collection_polygons(feature_collection):
+        zone_polygons.setdefault(tzname, []).append(polygon)
+    with open(tzwhere.tzwhere.DEFAULT_SHORTCUTS, 'r') as f:
+        lon_shortcuts, lat_shortcuts = json.load(f)
+    return zone_polygons, lon_shortcuts, lat_shortcuts
+
+
+def get_cell_candidates(lat, lon, lon_shortcuts, lat_shortcuts):
+    """
+    Returns the candidate zones of the cell, as tzwhere computes them:
+    {zone name: indices of its polygons in both bands}
+    """
+    lat_options = lat_shortcuts.get(str(float(lat)), {})
+    lon_options = lon_shortcuts.get(str(float(lon)), {})
+    return {
+        tzname: sorted(set(lat_options[tzname]) & set(lon_options[tzname]))
+        for tzname in sorted(set(lat_options) & set(lon_options))
+    }
+
+
+class IndexBuilder:
+    """
+    Builds the arrays of the index from the tzwhere data
+    """
+
+    def __init__(self, zone_polygons, lon_shortcuts, lat_shortcuts, subdivisions=SUBDIVISIONS):
+        self.subdivisions = subdivisions
+        self.lon_shortcuts = lon_shortcuts
+        self.lat_shortcuts = lat_shortcuts
+        self.zone_names = list(zone_polygons)
+        self.zone_ids = {name: i for i, name in enumerate(self.zone_names)}
+        self.polygon_ids = {}
+        self.raw_polygons = []
+        for tzname, polygons in zone_polygons.items():
+            for poly_index, polygon in enumerate(polygons):
+                self.polygon_ids[(tzname, poly_index)] = len(self.raw_polygons)
+                self.raw_polygons.append((self.zone_ids[tzname], polygon))
+        self._prepared = {}
+
+    def get_prepared(self, polygon_id):
+        if polygon_id not in self._prepared:
+            exterior, interiors = self.raw_polygons[polygon_id][1]
+            self._prepared[polygon_id] = prepared.prep(geometry.Polygon(exterior, interiors))
+        return self._prepared[polygon_id]
+
+    def get_subcells(self, lat, lon, polygon_ids):
+        """
+        Returns the zone of each subcell of the cell (row by row),
+        or NO_ZONE for the subcells on the borders
+        """
+        size = 1. / self.subdivisions
+        cell_box = geometry.box(lon, lat, lon + 1, lat + 1)
+        polygons = [
+            (self.raw_polygons[p][0], self.get_prepared(p))
+            for p in polygon_ids if self.get_prepared(p).intersects(cell_box)
+        ]
+        subcells = []
+        for i in range(self.subdivisions):
+            for j in range(self.subdivisions):
+                box = geometry.box(lon + j * size, lat + i * size, lon + (j + 1) * size, lat + (i + 1) * size)
+                zones = set()
+                inside = set()
+                for zone_id, polygon in polygons:
+                    if polygon.intersects(box):
+                        zones.add(zone_id)
+                        if polygon.contains_properly(box):
+                            inside.add(zone_id)
+                subcells.append(inside.pop() if len(zones) == 1 and len(inside) == 1 else NO_ZONE)
+        return subcells
+
+    def build(self, bounds=WORLD_BOUNDS):
+        """
+        Returns the arrays of the index, as {name: array.array}
+
+        The cells out of the bounds (min_lat, min_lon, max_lat, max_lon)
+        are left without zone.
+        """
+        min_lat, min_lon, max_lat, max_lon = bounds
+        grid = array('i', [NO_ZONE] * (180 * 360))
+        subcells = array('i')
+        cell_polygons = array('q', [0])
+        cell_polygon_ids = array('i')
+        for lat in range(min_lat, max_lat):
+            for lon in range(min_lon, max_lon):
+                candidates = get_cell_candidates(lat, lon, self.lon_shortcuts, self.lat_shortcuts)
+                if len(candidates) == 1:
+                    # tzwhere returns the only candidate, even outside of its polygons
+                    grid[get_cell_index(lat, lon)] = self.zone_ids[next(iter(candidates))]
+                elif candidates:
+                    polygon_ids = [
+                        self.polygon_ids[(tzname, poly_index)]
+                        for tzname, poly_indices in candidates.items()
+                        for poly_index in poly_indices
+                    ]
+                    grid[get_cell_index(lat, lon)] = MIXED_CELL - (len(cell_polygons) - 1)
+                    subcells.extend(self.get_subcells(lat, lon, polygon_ids))
+                    cell_polygon_ids.extend(polygon_ids)
+                    cell_polygons.append(len(cell_polygon_ids))
+
+        polygon_zones = array('i')
+        polygon_bboxes = array('d')
+        polygon_rings = array('q', [0])
+        ring_points = array('q', [0])
+        coords = array('d')
+        for zone_id, (exterior, interiors) in self.raw_polygons:
+            polygon_zones.append(zone_id)
+            polygon_bboxes.extend([
+                min(lon for lon, _ in exterior), min(lat for _, lat in exterior),
+                max(lon for lon, _ in exterior), max(lat for _, lat in exterior),
+            ])
+            for ring in [exterior] + list(interiors):
+                for point_lon, point_lat in ring:
+                    coords.extend((point_lon, point_lat))
+                ring_points.append(len(coords) // 2)
+            polygon_rings.append(len(ring_points) - 1)
+
+        return collections.OrderedDict([
+            ('grid', grid),
+            ('subcells', subcells),
+            ('cell_polygons', cell_polygons),
+            ('cell_polygon_ids', cell_polygon_ids),
+            ('polygon_zones', polygon_zones),
+            ('polygon_bboxes', polygon_bboxes),
+            ('polygon_rings', polygon_rings),
+            ('ring_points', ring_points),
+            ('coords', coords),
+        ])
+
+
+def write_index(path, zone_names, arrays, subdivisions=SUBDIVISIONS):
+    """
+    Writes the index: a JSON header (the zone names and the layout of the
+    arrays), followed by the arrays, aligned on 8 bytes
+    """
+    layout = collections.OrderedDict()
+    offset = 0
+    for name, values in arrays.items():
+        layout[name] = {'offset': offset, 'typecode': values.typecode, 'length': len(values)}
+        offset += math.ceil(len(values) * values.itemsize / ALIGNMENT) * ALIGNMENT
+    header = json.dumps({
+        'version': FORMAT_VERSION,
+        'byteorder': sys.byteorder,
+        'subdivisions': subdivisions,
+        'zones': zone_names,
+        'arrays': layout,
+    }).encode('utf-8')
+    header += b' ' * (-(len(MAGIC) + 4 + len(header)) % ALIGNMENT)
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(4, 'little'))
+        f.write(header)
+        for values in arrays.values():
+            data = values.tobytes()
+            f.write(data)
+            f.write(b'\0' * (-len(data) % ALIGNMENT))
+    # The processes that have already mapped the previous index keep it
+    os.replace(tmp_path, path)
+
+
+def build_index(path=DEFAULT_PATH, subdivisions=SUBDIVISIONS, bounds=WORLD_BOUNDS):
+    zone_polygons, lon_shortcuts, lat_shortcuts = read_tzwhere_data()
+    builder = IndexBuilder(zone_polygons, lon_shortcuts, lat_shortcuts, subdivisions)
+    write_index(path, builder.zone_names, builder.build(bounds), subdivisions)
+
+
+class TimezoneIndex:
+    """
+    Reader of the index, whose arrays are views of the memory-mapped file
+    """
+
+    def __init__(self, path, polygons_cache_size=1024):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f'{path} is not a timezone index')
+        header_size = int.from_bytes(self._mmap[len(MAGIC):len(MAGIC) + 4], 'little')
+        data_offset = len(MAGIC) + 4 + header_size
+        header = json.loads(self._mmap[len(MAGIC) + 4:data_offset].decode('utf-8'))
+        if header['version'] != FORMAT_VERSION or header['byteorder'] != sys.byteorder:
+            raise ValueError(f'{path} was built for another version of Idunn or another platform')
+
+        self.subdivisions = header['subdivisions']
+        self.zone_names = header['zones']
+        data = memoryview(self._mmap)
+        for name, layout in header['arrays'].items():
+            start = data_offset + layout['offset']
+            end = start + layout['length'] * array(layout['typecode']).itemsize
+            setattr(self, name, data[start:end].cast(layout['typecode']))
+        self.get_polygon = lru_cache(maxsize=polygons_cache_size)(self._make_polygon)
+
+    def _make_polygon(self, polygon_id):
+        rings = []
+        for ring in range(self.polygon_rings[polygon_id], self.polygon_rings[polygon_id + 1]):
+            start, end = 2 * self.ring_points[ring], 2 * self.ring_points[ring + 1]
+            rings.append(list(zip(self.coords[start:end:2], self.coords[start + 1:end:2])))
+        polygon = geometry.Polygon(rings[0], rings[1:])
+        return polygon, prepared.prep(polygon)
+
+    def locate(self, lat, lon):
+        """
+        Returns (name of the timezone, None) when the grid gives the timezone
+        of the point, or (None, mixed cell) when the point is on a border
+        and must be refined in the polygons of its cell
+        """
+        cell_lat = math.floor(lat)
+        cell_lon = math.floor(lon)
+        if not (-90 <= cell_lat < 90 and -180 <= cell_lon < 180):
+            return None, None
+        value = self.grid[get_cell_index(cell_lat, cell_lon)]
+        if value == NO_ZONE:
+            return None, None
+        if value >= 0:
+            return self.zone_names[value], None
+
+        mixed_cell = MIXED_CELL - value
+        i = min(int((lat - cell_lat) * self.subdivisions), self.subdivisions - 1)
+        j = min(int((lon - cell_lon) * self.subdivisions), self.subdivisions - 1)
+        zone_id = self.subcells[(mixed_cell * self.subdivisions + i) * self.subdivisions + j]
+        if zone_id != NO_ZONE:
+            return self.zone_names[zone_id], None
+        return None, mixed_cell
+
+    def tz_name_at(self, lat, lon):
+        """
+        Returns the name of the timezone of the point, or None
+        """
+        tzname, mixed_cell = self.locate(lat, lon)
+        if mixed_cell is None:
+            return tzname
+        return self.refine(mixed_cell, lat, lon)
+
+    def get_polygon_ids(self, mixed_cell):
+        return self.cell_polygon_ids[self.cell_polygons[mixed_cell]:self.cell_polygons[mixed_cell + 1]]
+
+    def get_zone_in_box(self, mixed_cell, min_lat, min_lon, max_lat, max_lon):
+        """
+        Returns the name of the timezone of all the points of the box
+        (in the mixed cell), or None if the box meets a border
+        """
+        # The box is slightly enlarged, so that the rounding errors never hide a border
+        box = geometry.box(min_lon - BOX_MARGIN, min_lat - BOX_MARGIN, max_lon + BOX_MARGIN, max_lat + BOX_MARGIN)
+        zone_ids = set()
+        inside = False
+        for polygon_id in self.get_polygon_ids(mixed_cell):
+            bbox = self.polygon_bboxes[4 * polygon_id:4 * polygon_id + 4]
+            if bbox[0] > box.bounds[2] or bbox[2] < box.bounds[0] or bbox[1] > box.bounds[3] or bbox[3] < box.bounds[1]:
+                continue
+            polygon = self.get_polygon(polygon_id)[1]
+            if polygon.intersects(box):
+                zone_ids.add(self.polygon_zones[polygon_id])
+                if len(zone_ids) > 1:
+                    return None
+                inside = inside or polygon.contains_properly(box)
+        if not inside:
+            return None
+        return self.zone_names[zone_ids.pop()]
+
+    def refine(self, mixed_cell, lat, lon):
+        """
+        Looks up the point in the candidate polygons of the cell,
+        and returns the zone of the nearest polygon if none contains it
+        """
+        polygon_ids = self.get_polygon_ids(mixed_cell)
+        point = geometry.Point(lon, lat)
+        for polygon_id in polygon_ids:
+            min_lon, min_lat, max_lon, max_lat = self.polygon_bboxes[4 * polygon_id:4 * polygon_id + 4]
+            if min_lon < lon < max_lon and min_lat < lat < max_lat:
+                if self.get_polygon(polygon_id)[1].contains_properly(point):
+                    return self.zone_names[self.polygon_zones[polygon_id]]
+
+        distances = [
+            (self.get_polygon(polygon_id)[0].distance(point), self.polygon_zones[polygon_id])
+            for polygon_id in polygon_ids
+        ]
+        if not distances:
+            return None
+        return self.zone_names[min(distances)[1]]
+
+
+class TimezoneFinder:
+    """
+    Finds the timezone of the POIs, with the index at TIMEZONE_INDEX_PATH
+
+    Without index, tzwhere is loaded (lazily), which is slower
+    and takes hundreds of MB in each process.
+    """
+    _index = None
+    _tzwhere = None
+
+    @classmethod
+    def init_index(cls):
+        from app import settings
+        path = settings['TIMEZONE_INDEX_PATH'] or DEFAULT_PATH
+        try:
+            cls._index = TimezoneIndex(path, int(settings['TIMEZONE_INDEX_POLYGONS_CACHE_SIZE']))
+        except FileNotFoundError:
+            logger.warning(
+                "The timezone index %s is missing, falling back to tzwhere "
+                "(build it with 'python -m idunn.utils.timezone_index build')", path
+            )
+            cls._index = False
+        except (OSError, ValueError) as e:
+            logger.warning("The timezone index %s cannot be read (%s), falling back to tzwhere", path, e)
+            cls._index = False
+
+    @classmethod
+    def clear(cls):
+        """
+        The index is read again (with the current settings) on the next lookup
+        """
+        cls._index = None
+
+    @classmethod
+    def get_tzwhere(cls):
+        if cls._tzwhere is None:
+            from tzwhere import tzwhere
+            cls._tzwhere = tzwhere.tzwhere(forceTZ=True)
+        return cls._tzwhere
+
+    @classmethod
+    def load(cls):
+        """
+        Loads the index (or tzwhere) on start, before the workers are forked
+        """
+        if cls._index is None:
+            cls.init_index()
+        if cls._index is False:
+            cls.get_tzwhere()
+
+    @classmethod
+    def get_index(cls):
+        """
+        Returns the index, or None if tzwhere is used instead
+        """
+        if cls._index is None:
+            cls.init_index()
+        return cls._index or None
+
+    @classmethod
+    def tz_name_at(cls, lat, lon):
+        index = cls.get_index()
+        if index is None:
+            return cls.get_tzwhere().tzNameAt(lat, lon, forceTZ=True)
+        return index.tz_name_at(lat, lon)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] != 'build':
+        print(__doc__)
+        sys.exit(1)
+    index_path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_PATH
+    start = time.time()
+    build_index(index_path)
+    print(f'Timezone index built in {index_path} ({time.time() - start:.0f}s)')
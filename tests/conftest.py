@@ -6,10 +6,24 @@ from app import app, settings
 from idunn.utils.settings import SettingsComponent
 from idunn.blocks.wikipedia import HTTPError40X
 from idunn.blocks.wikipedia import WikipediaLimiter
+from idunn.utils.mimir_cache import MimirCache
+from idunn.utils.admin_cache import AdminCache
+from idunn.utils.timezone_cache import TimezoneCache
+from idunn.utils.opening_hours_cache import OpeningHoursCache
+from idunn.utils.place_cache import PlaceCache
+from idunn.blocks.base import TypeValidation
 import time
 from .utils import override_settings
 
 
+@pytest.fixture(scope='session', autouse=True)
+def validate_types():
+    """
+    The fields of the places and blocks are always validated in the tests
+    """
+    TypeValidation._enabled = True
+
+
 @pytest.fixture(scope='session')
 def mimir_es(docker_services):
     """Ensure that ES is up and responsive."""
@@ -89,6 +103,18 @@ def init_indices(mimir_client, wiki_client):
         }
     )
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """
+    The tests (re)load their documents in ES, so they must
+    not get the documents or places cached by the previous tests
+    """
+    MimirCache.clear()
+    AdminCache.clear()
+    TimezoneCache.clear()
+    OpeningHoursCache.clear()
+    PlaceCache.clear()
+
 @pytest.fixture(scope="module", autouse=True)
 def mock_external_requests():
     with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
@@ -0,0 +1,226 @@
+import json
+from unittest.mock import MagicMock, patch
+import pytest
+from apistar import http
+
+from app import settings
+
+from idunn.api.places import get_place, get_places
+from idunn.api.utils import fetch_es_place, fetch_es_places, get_source_filter, LONG
+from idunn.places import POI, Address
+from idunn.utils.admin_cache import AdminCache, AdminNotCached
+from idunn.utils.mimir_cache import MimirCache
+from idunn.utils.index_names import IndexNames
+from .utils import override_settings
+
+"""
+    This module tests how the admins of the places are rendered once
+    and shared, without any running elasticsearch
+"""
+
+INDICES = IndexNames({"poi": "munin_poi"}, id_prefixes={"pois": "poi"})
+
+ORSAY = {
+    "id": "admin:osm:relation:2188567",
+    "label": "Orsay (91400), Essonne, Île-de-France, France",
+    "name": "Orsay",
+    "level": 8,
+    "zip_codes": ["91400"],
+}
+
+
+def poi_doc(id, admins):
+    return {
+        '_index': 'munin_poi', '_type': 'poi', '_id': id, 'found': True,
+        '_source': {'id': id, 'administrative_regions': admins},
+    }
+
+
+@pytest.fixture
+def warm_cache():
+    AdminCache.get_cache()
+    AdminCache._hit_ratio = 1.
+
+
+def test_admin_ids_source_filter(warm_cache):
+    """
+    Only the ids of the admins are fetched while the cache is warm
+    """
+    include = get_source_filter('poi', LONG)['include']
+    assert 'administrative_regions.id' in include
+    assert 'administrative_regions.name' not in include
+
+    include = get_source_filter('address', LONG, full_admins=True)['include']
+    assert {'street.administrative_regions.id', 'street.administrative_regions.label'} <= set(include)
+
+
+def test_cold_cache():
+    """
+    The admins are fetched with the places until the cache is warm
+    """
+    assert not AdminCache.is_warm()
+    assert 'administrative_regions.name' in get_source_filter('poi', LONG)['include']
+
+    for _ in range(300):
+        POI.build_admins([ORSAY])
+    assert AdminCache.is_warm()
+    assert 'administrative_regions.name' not in get_source_filter('poi', LONG)['include']
+
+    # The ratio falls with the admins that are not cached
+    for i in range(50):
+        POI.build_admins([dict(ORSAY, id=f"admin:osm:relation:{i}")])
+    assert not AdminCache.is_warm()
+
+
+def test_admins_are_shared():
+    first = POI.build_admins([ORSAY])
+    second = Address.build_admins([{"id": ORSAY["id"]}])
+
+    assert second == first
+    assert second[0] is first[0]
+    assert first[0]['class_name'] == 8
+    assert first[0]['postcodes'] == ["91400"]
+
+
+def test_place_refetched_with_its_admins(warm_cache):
+    """
+    A place whose admins are not cached is fetched again with their fields
+    """
+    es = MagicMock()
+    es.get.side_effect = [
+        poi_doc('pois:osm:node:1', [{"id": ORSAY["id"]}]),
+        poi_doc('pois:osm:node:1', [ORSAY]),
+    ]
+
+    es_place = fetch_es_place('pois:osm:node:1', es, INDICES, None)
+
+    assert es.get.call_count == 2
+    full_include = es.get.call_args[1]['_source_include']
+    assert 'administrative_regions.name' in full_include
+    assert es_place[0]['_source']['administrative_regions'] == [ORSAY]
+
+    POI.build_admins([ORSAY])
+    es.get.side_effect = [poi_doc('pois:osm:node:2', [{"id": ORSAY["id"]}])]
+    fetch_es_place('pois:osm:node:2', es, INDICES, None)
+    assert es.get.call_count == 3
+
+
+def test_places_refetched_with_their_admins(warm_cache):
+    POI.build_admins([ORSAY])
+    unknown_admin = {"id": "admin:osm:relation:7444"}
+
+    es = MagicMock()
+    es.mget.side_effect = [
+        {'docs': [
+            poi_doc('pois:osm:node:1', [{"id": ORSAY["id"]}]),
+            poi_doc('pois:osm:node:2', [unknown_admin]),
+        ]},
+        {'docs': [poi_doc('pois:osm:node:2', [dict(ORSAY, id=unknown_admin["id"], name="Paris")])]},
+    ]
+
+    es_places = fetch_es_places(['pois:osm:node:1', 'pois:osm:node:2'], es, INDICES, None)
+
+    assert es.mget.call_count == 2
+    refetched = es.mget.call_args[1]['body']['docs']
+    assert [doc['_id'] for doc in refetched] == ['pois:osm:node:2']
+    assert es_places['pois:osm:node:2']['_source']['administrative_regions'][0]['name'] == "Paris"
+
+
+def test_admins_resolved_when_fetched(warm_cache):
+    """
+    The fields of the cached admins are kept with the place when it is
+    fetched, so that it is rendered even if they are evicted before
+    the place is loaded
+    """
+    POI.build_admins([ORSAY])
+    es = MagicMock()
+    es.get.side_effect = [poi_doc('pois:osm:node:1', [{"id": ORSAY["id"]}])]
+
+    es_place = fetch_es_place('pois:osm:node:1', es, INDICES, None)
+    assert es.get.call_count == 1
+    AdminCache.clear()
+
+    admins = POI.build_admins(es_place[0]['_source']['administrative_regions'])
+    assert admins[0]['name'] == "Orsay"
+    assert admins[0]['postcodes'] == ["91400"]
+
+    # The document in the MimirCache still has only the ids of its admins
+    AdminCache.clear()
+    es.get.side_effect = [poi_doc('pois:osm:node:1', [ORSAY])]
+    es_place = fetch_es_place('pois:osm:node:1', es, INDICES, None)
+    assert es.get.call_count == 2
+    assert es_place[0]['_source']['administrative_regions'] == [ORSAY]
+
+
+def test_admin_without_fields_never_rendered():
+    with pytest.raises(AdminNotCached):
+        POI.build_admins([{"id": ORSAY["id"]}])
+
+
+def test_admins_renewed_after_reindex_without_mimir_cache(warm_cache):
+    """
+    The admins are keyed by the mimir indices even if the MimirCache is disabled
+    """
+    es = MagicMock()
+    es.indices.get_alias.return_value = {'munin_poi_20181001': {'aliases': {'munin_poi': {}}}}
+    with override_settings({'MIMIR_CACHE_SIZE': 0, 'MIMIR_CACHE_ALIAS_CHECK_PERIOD': 0}):
+        MimirCache.init_cache()
+        try:
+            es.get.side_effect = [poi_doc('pois:osm:node:1', [ORSAY])]
+            es_place = fetch_es_place('pois:osm:node:1', es, INDICES, None)
+            POI.build_admins(es_place[0]['_source']['administrative_regions'])
+            assert MimirCache.get_generation() == ['munin_poi_20181001']
+
+            es.get.side_effect = [poi_doc('pois:osm:node:1', [{"id": ORSAY["id"]}])]
+            fetch_es_place('pois:osm:node:1', es, INDICES, None)
+            assert es.get.call_count == 2
+
+            # After a reindex, the admins are fetched again
+            es.indices.get_alias.return_value = {'munin_poi_20181015': {'aliases': {'munin_poi': {}}}}
+            es.get.side_effect = [
+                poi_doc('pois:osm:node:1', [{"id": ORSAY["id"]}]),
+                poi_doc('pois:osm:node:1', [ORSAY]),
+            ]
+            fetch_es_place('pois:osm:node:1', es, INDICES, None)
+            assert es.get.call_count == 4
+        finally:
+            MimirCache._cache = None
+
+
+def test_unresolved_admin_refetched(warm_cache):
+    """
+    A place loaded with an admin that was not resolved
+    is fetched again with the fields of its admins
+    """
+    es = MagicMock()
+    es.get.side_effect = [
+        poi_doc('pois:osm:node:1', [{"id": ORSAY["id"]}]),
+        poi_doc('pois:osm:node:1', [ORSAY]),
+    ]
+    with patch('idunn.api.utils.resolve_admins', side_effect=lambda doc: doc):
+        place = get_place('pois:osm:node:1', es, INDICES, settings, http.Headers(), lang='fr')
+
+    assert es.get.call_count == 2
+    assert 'administrative_regions.name' in es.get.call_args[1]['_source_include']
+    assert json.loads(place.content)['address']['admins'][0]['name'] == "Orsay"
+
+    es.mget.return_value = {'docs': [poi_doc('pois:osm:node:2', [{"id": "admin:osm:relation:7444"}])]}
+    es.get.side_effect = [poi_doc('pois:osm:node:2', [dict(ORSAY, id="admin:osm:relation:7444")])]
+    with patch('idunn.api.utils.resolve_admins', side_effect=lambda doc: doc):
+        response = get_places('pois:osm:node:2', es, INDICES, settings, lang='fr')
+    assert json.loads(response.content)['errors'] == []
+    assert es.get.call_count == 3
+
+
+def test_disabled_cache():
+    AdminCache._cache = None
+    from app import settings
+    size = settings['ADMIN_CACHE_SIZE']
+    settings._settings['ADMIN_CACHE_SIZE'] = 0
+    try:
+        assert not AdminCache.is_enabled()
+        assert 'administrative_regions.name' in get_source_filter('poi', LONG)['include']
+        assert POI.build_admins([ORSAY])[0]['name'] == "Orsay"
+    finally:
+        settings._settings['ADMIN_CACHE_SIZE'] = size
+        AdminCache._cache = None
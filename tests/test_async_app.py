@@ -0,0 +1,69 @@
+import json
+import asyncio
+import os
+from unittest.mock import MagicMock
+
+from app import settings
+from apistar import ASyncApp, http
+from idunn.api.urls import get_api_urls
+from idunn.api.places import get_place_async
+from idunn.utils.index_names import IndexNames
+from idunn.utils.deadline import Deadline
+from .utils import override_settings
+
+"""
+    This module tests the handlers of the async app,
+    without any running elasticsearch
+"""
+
+INDICES = IndexNames(
+    {
+        "admin": "munin_admin",
+        "street": "munin_street",
+        "address": "munin_addr",
+        "poi": "munin_poi",
+    },
+    id_prefixes={"admin": "admin", "street": "street", "addr": "address", "pois": "poi"}
+)
+
+
+def read_fixture(filename):
+    filepath = os.path.join(os.path.dirname(__file__), 'fixtures', filename)
+    with open(filepath, "r") as f:
+        return json.load(f)
+
+
+def test_async_routes():
+    with override_settings({'ASYNC_APP': True}):
+        routes = get_api_urls(settings)
+    handlers = {r.url: r.handler for r in routes}
+
+    assert handlers['/places/{id}'] is get_place_async
+    assert all(asyncio.iscoroutinefunction(handlers[url]) for url in ['/pois/{id}', '/places/{id}', '/places'])
+
+    # The async app accepts these handlers
+    ASyncApp(routes=routes)
+
+
+def test_get_place_async():
+    es = MagicMock()
+    es.get.return_value = {
+        '_index': 'munin_admin',
+        '_type': 'admin',
+        '_id': 'admin:osm:relation:123057',
+        'found': True,
+        '_source': read_fixture('admin_goujounac.json')
+    }
+
+    loop = asyncio.new_event_loop()
+    try:
+        response = loop.run_until_complete(
+            get_place_async('admin:osm:relation:123057', es, INDICES, settings, Deadline(10), http.Headers(), lang='fr')
+        )
+    finally:
+        loop.close()
+
+    place = json.loads(response.content.decode('utf-8'))
+    assert place['id'] == 'admin:osm:relation:123057'
+    assert place['name'] == 'Goujounac'
+    assert es.get.call_count == 1
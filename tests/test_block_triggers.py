@@ -0,0 +1,45 @@
+from unittest.mock import patch
+
+from idunn.api.utils import build_blocks, get_source_filter, LONG
+from idunn.blocks import ALL_BLOCKS, InformationBlock, PhoneBlock, WikipediaBlock
+from idunn.blocks.services_and_information import BreweryBlock
+
+"""
+    This module tests that the blocks are built only for
+    the POIs having their trigger keys
+"""
+
+
+def test_blocks_skipped_without_trigger_keys():
+    es_poi = {'id': 'osm:node:1', 'properties': {'phone': '+33 1 40 49 48 14'}}
+
+    with patch.object(WikipediaBlock, 'from_es') as wikipedia_from_es, \
+            patch.object(InformationBlock, 'from_es') as information_from_es:
+        blocks = build_blocks(es_poi, 'fr', LONG)
+
+    assert [b['type'] for b in blocks] == ['phone']
+    wikipedia_from_es.assert_not_called()
+    information_from_es.assert_not_called()
+
+
+def test_children_skipped_without_trigger_keys():
+    es_poi = {'id': 'osm:node:1', 'properties': {'wheelchair': 'yes'}}
+
+    with patch.object(BreweryBlock, 'from_es') as brewery_from_es, \
+            patch.object(WikipediaBlock, 'from_es') as wikipedia_from_es:
+        block = InformationBlock.build(es_poi, 'fr')
+
+    assert block.blocks[0]['type'] == 'services_and_information'
+    brewery_from_es.assert_not_called()
+    wikipedia_from_es.assert_not_called()
+
+
+def test_trigger_keys():
+    assert PhoneBlock.is_triggered({'contact:phone': '+33 1 40 49 48 14'})
+    assert not PhoneBlock.is_triggered({'wheelchair': 'yes'})
+    assert set(InformationBlock.TRIGGER_KEYS) >= {'wikidata', 'wikipedia', 'wheelchair', 'brewery'}
+    assert all(b.TRIGGER_KEYS for b in ALL_BLOCKS)
+
+
+def test_properties_fetched_for_the_triggers():
+    assert 'properties' in get_source_filter('poi', LONG)['include']
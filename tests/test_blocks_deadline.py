@@ -0,0 +1,92 @@
+import json
+import os
+import time
+import pytest
+from unittest.mock import patch
+
+from app import settings
+from idunn.api.utils import LONG
+from idunn.blocks import InformationBlock, PhoneBlock, WikipediaBlock
+from idunn.places import POI
+from idunn.utils.deadline import Deadline, get_current_deadline
+from .utils import override_settings
+
+"""
+    This module tests that the blocks of a place are built
+    within the BLOCKS_TIMEOUT deadline
+"""
+
+
+@pytest.fixture
+def orsay_museum():
+    filepath = os.path.join(os.path.dirname(__file__), 'fixtures', 'orsay_museum.json')
+    with open(filepath, "r") as f:
+        return json.load(f)
+
+
+@pytest.fixture(autouse=True)
+def no_wikipedia():
+    with patch.object(WikipediaBlock, 'from_es', return_value=None):
+        yield
+
+
+def slow_from_es(es_poi, lang):
+    time.sleep(0.5)
+    return None
+
+
+def test_slow_block_left_out(orsay_museum):
+    """
+    A block that is not built in time is left out of the place,
+    which is then not cached
+    """
+    with override_settings({'BLOCKS_TIMEOUT': 0.1}), \
+            patch.object(InformationBlock, 'from_es', side_effect=slow_from_es) as from_es:
+        start = time.monotonic()
+        poi = POI.load_place(orsay_museum, 'fr', settings, LONG)
+        duration = time.monotonic() - start
+
+        assert duration < 0.4
+        assert from_es.call_count == 1
+
+    block_types = [b['type'] for b in poi['blocks']]
+    assert 'information' not in block_types
+    assert {'opening_hours', 'phone'} <= set(block_types)
+    assert poi.partial
+    assert poi.get_cache_ttl(60) == 0
+
+
+def test_all_blocks_in_time(orsay_museum):
+    with override_settings({'BLOCKS_TIMEOUT': 0.5}), \
+            patch.object(PhoneBlock, 'from_es', side_effect=lambda es_poi, lang: None):
+        poi = POI.load_place(orsay_museum, 'fr', settings, LONG)
+
+    assert not poi.partial
+    assert 'phone' not in [b['type'] for b in poi['blocks']]
+
+
+def test_request_deadline_in_blocks(orsay_museum):
+    """
+    The blocks are built with the deadline of the request
+    """
+    deadlines = []
+
+    def from_es(es_poi, lang):
+        deadlines.append(get_current_deadline())
+        return None
+
+    deadline = Deadline(5)
+    with override_settings({'BLOCKS_TIMEOUT': 0.5}), \
+            patch.object(PhoneBlock, 'from_es', side_effect=from_es), \
+            deadline.activate():
+        POI.load_place(orsay_museum, 'fr', settings, LONG)
+
+    assert deadlines == [deadline]
+
+
+def test_sequential_blocks(orsay_museum):
+    with override_settings({'BLOCKS_TIMEOUT': 0}):
+        poi = POI.load_place(orsay_museum, 'fr', settings, LONG)
+
+    assert not poi.partial
+    assert poi['blocks'][0]['type'] == 'opening_hours'
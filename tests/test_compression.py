@@ -0,0 +1,51 @@
+import gzip
+import pytest
+from apistar import http
+
+from app import settings
+from idunn.utils import compression
+from idunn.utils.compression import CompressionHook
+
+"""
+    This module tests the negotiation and the compression of the responses
+"""
+
+PLACE = {"id": "osm:node:5286293722", "name": "Musée d'Orsay", "blocks": [{"type": "opening_hours"}] * 100}
+
+
+def respond(accept_encoding, content=PLACE):
+    response = http.JSONResponse(content)
+    headers = http.Headers({'Accept-Encoding': accept_encoding} if accept_encoding else {})
+    CompressionHook().on_response(response, headers, settings)
+    return response
+
+
+def test_gzip_response(monkeypatch):
+    monkeypatch.setattr(compression, 'brotli', None)
+    plain = http.JSONResponse(PLACE).content
+
+    response = respond('gzip, deflate, br')
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert int(response.headers['Content-Length']) == len(response.content) < len(plain)
+    assert gzip.decompress(response.content) == plain
+
+
+def test_brotli_response():
+    brotli = pytest.importorskip('brotli')
+    plain = http.JSONResponse(PLACE).content
+
+    response = respond('gzip, br')
+
+    assert response.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(response.content) == plain
+
+
+def test_response_not_compressed():
+    assert 'Content-Encoding' not in respond(None).headers
+    assert 'Content-Encoding' not in respond('gzip;q=0').headers
+
+    small_response = respond('gzip', {"id": "osm:node:5286293722"})
+    assert 'Content-Encoding' not in small_response.headers
+    assert small_response.headers['Vary'] == 'Accept-Encoding'
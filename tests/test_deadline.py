@@ -0,0 +1,63 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from apistar import http
+
+from app import settings
+from idunn.api.utils import fetch_es_place
+from idunn.blocks import WikipediaBlock
+from idunn.utils.deadline import Deadline, DeadlineComponent, DeadlineExceeded
+from .test_es_lookup import INDICES, es_doc
+
+"""
+    This module tests that the calls to ES, Redis and Wikipedia
+    are bound by the deadline of the request
+"""
+
+
+def test_deadline_from_header():
+    component = DeadlineComponent()
+
+    deadline = component.resolve(settings, http.Headers([('x-request-timeout', '0.5')]))
+    assert deadline.remaining() <= 0.5
+
+    # The header can only shorten the deadline
+    deadline = component.resolve(settings, http.Headers([('x-request-timeout', '3600')]))
+    assert deadline.remaining() <= float(settings['REQUEST_TIMEOUT'])
+
+    deadline = component.resolve(settings, http.Headers([('x-request-timeout', 'soon')]))
+    assert deadline.remaining() > 0.5
+
+
+def test_es_timeout_from_deadline():
+    es = MagicMock()
+    es.get.return_value = es_doc('munin_poi', 'poi', 'osm:way:63178753')
+
+    with Deadline(1).activate():
+        fetch_es_place('osm:way:63178753', es, INDICES, 'poi')
+
+    assert 0 < es.get.call_args[1]['request_timeout'] <= 1
+
+
+def test_es_deadline_exceeded():
+    es = MagicMock()
+
+    with Deadline(0).activate():
+        with pytest.raises(DeadlineExceeded) as exc_info:
+            fetch_es_place('osm:way:63178753', es, INDICES, 'poi')
+
+    assert exc_info.value.status_code == 504
+    es.get.assert_not_called()
+
+
+def test_wikipedia_skipped_after_deadline():
+    es_poi = {
+        'id': 'osm:way:63178753',
+        'properties': {'wikipedia': "fr:Musée d'Orsay"}
+    }
+
+    with Deadline(0).activate(), \
+            patch.object(WikipediaBlock._wiki_session, '_session') as session:
+        block = WikipediaBlock.from_es(es_poi, 'fr')
+
+    assert block is None
+    session.get.assert_not_called()
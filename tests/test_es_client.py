@@ -0,0 +1,53 @@
+import socket
+
+from app import settings
+from idunn.utils import es_wrapper
+from idunn.utils.es_wrapper import get_elasticsearch, MIMIR_CLUSTER, WIKI_CLUSTER
+from .utils import override_settings
+
+"""
+    This module tests the creation of the ES clients,
+    without any running elasticsearch
+"""
+
+
+def get_node_pool(client):
+    return client.transport.connection_pool.connections[0].pool
+
+
+def test_client_settings():
+    with override_settings({
+        'WIKI_ES': 'http://wiki-es.invalid:9200',
+        'WIKI_ES_MAX_CONNECTIONS': '25',
+        'WIKI_ES_TCP_KEEPALIVE': True,
+    }):
+        client = get_elasticsearch(WIKI_CLUSTER, settings)
+
+    pool = get_node_pool(client)
+    assert pool.pool.maxsize == 25
+    assert pool.timeout.read_timeout == float(settings['WIKI_ES_TIMEOUT'])
+    assert (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1) in pool.conn_kw['socket_options']
+
+
+def test_client_per_process():
+    """
+    A client is reused in a process, but never in a forked process
+    """
+    client = get_elasticsearch(MIMIR_CLUSTER, settings)
+    assert get_elasticsearch(MIMIR_CLUSTER, settings) is client
+
+    # As if the process had been forked
+    es_wrapper._clients_pid = None
+    assert get_elasticsearch(MIMIR_CLUSTER, settings) is not client
+
+
+def test_pool_stats():
+    with override_settings({'MIMIR_ES': 'http://mimir-es.invalid:9200'}):
+        client = get_elasticsearch(MIMIR_CLUSTER, settings)
+    pool = get_node_pool(client)
+
+    conn = pool._get_conn()
+    assert client.transport.get_pool_stats() == {'in_use': 1, 'idle': 0, 'created': 1, 'discarded': 0}
+
+    pool._put_conn(conn)
+    assert client.transport.get_pool_stats() == {'in_use': 0, 'idle': 1, 'created': 1, 'discarded': 0}
@@ -0,0 +1,181 @@
+import pytest
+from unittest.mock import MagicMock, ANY
+from apistar.exceptions import NotFound
+
+from idunn.api.utils import fetch_es_place, fetch_es_places, get_source_filter, LONG, SHORT
+from idunn.utils.index_names import IndexNames
+from idunn.utils.mimir_cache import MimirCache
+
+"""
+    This module tests how places are looked up in elasticsearch,
+    without any running elasticsearch
+"""
+
+INDICES = IndexNames(
+    {
+        "admin": "munin_admin",
+        "street": "munin_street",
+        "address": "munin_addr",
+        "poi": "munin_poi",
+    },
+    id_prefixes={"admin": "admin", "street": "street", "addr": "address", "pois": "poi"}
+)
+
+
+def es_doc(index, doc_type, id, found=True):
+    doc = {'_index': index, '_type': doc_type, '_id': id, 'found': found}
+    if found:
+        doc['_source'] = {'id': id}
+    return doc
+
+
+def test_get_with_type():
+    es = MagicMock()
+    es.get.return_value = es_doc('munin_poi', 'poi', 'osm:way:63178753')
+
+    es_place = fetch_es_place('osm:way:63178753', es, INDICES, 'poi')
+
+    es.get.assert_called_once_with(
+        index='munin_poi',
+        id='osm:way:63178753',
+        _source_include=ANY,
+        _source_exclude=ANY,
+        ignore=404,
+        request_timeout=None
+    )
+    es.mget.assert_not_called()
+    assert es_place[0]['_type'] == 'poi'
+    assert es_place[0]['_source'] == {'id': 'osm:way:63178753'}
+
+
+def test_get_with_id_prefix():
+    """
+    The index of an untyped admin is deduced from the prefix of its id
+    """
+    es = MagicMock()
+    es.get.return_value = es_doc('munin_admin', 'admin', 'admin:osm:relation:123057')
+
+    es_place = fetch_es_place('admin:osm:relation:123057', es, INDICES, None)
+
+    es.get.assert_called_once_with(
+        index='munin_admin',
+        id='admin:osm:relation:123057',
+        _source_include=ANY,
+        _source_exclude=ANY,
+        ignore=404,
+        request_timeout=None
+    )
+    assert es_place[0]['_type'] == 'admin'
+
+
+def test_mget_unknown_prefix():
+    """
+    All indices are queried in one multi-get when the prefix is unknown
+    """
+    es = MagicMock()
+    es.mget.return_value = {
+        'docs': [
+            es_doc('munin_admin', None, '35460343', found=False),
+            es_doc('munin_street', 'street', '35460343'),
+            es_doc('munin_addr', None, '35460343', found=False),
+            es_doc('munin_poi', None, '35460343', found=False),
+        ]
+    }
+
+    es_place = fetch_es_place('35460343', es, INDICES, None)
+
+    es.get.assert_not_called()
+    requested_indices = [d['_index'] for d in es.mget.call_args[1]['body']['docs']]
+    assert sorted(requested_indices) == ['munin_addr', 'munin_admin', 'munin_poi', 'munin_street']
+    assert len(es_place) == 1
+    assert es_place[0]['_type'] == 'street'
+
+
+def test_not_found():
+    es = MagicMock()
+    es.get.return_value = es_doc('munin_poi', None, 'addr:5.108632;48.810273', found=False)
+
+    with pytest.raises(NotFound):
+        fetch_es_place('addr:5.108632;48.810273', es, INDICES, 'poi')
+
+
+def test_mget_several_places():
+    """
+    Several places are fetched in a single multi-get
+    """
+    es = MagicMock()
+    es.mget.return_value = {
+        'docs': [
+            es_doc('munin_admin', 'admin', 'admin:osm:relation:123057'),
+            es_doc('munin_admin', None, '35460343', found=False),
+            es_doc('munin_street', 'street', '35460343'),
+            es_doc('munin_addr', None, '35460343', found=False),
+            es_doc('munin_poi', None, '35460343', found=False),
+            es_doc('munin_poi', None, 'pois:unknown', found=False),
+        ]
+    }
+
+    es_places = fetch_es_places(['admin:osm:relation:123057', '35460343', 'pois:unknown'], es, INDICES, None)
+
+    es.mget.assert_called_once()
+    requested_indices = [d['_index'] for d in es.mget.call_args[1]['body']['docs']]
+    assert requested_indices.count('munin_admin') == 2
+    assert requested_indices.count('munin_poi') == 2
+    assert set(es_places.keys()) == {'admin:osm:relation:123057', '35460343'}
+    assert es_places['35460343']['_type'] == 'street'
+
+
+def test_cached_place():
+    """
+    A place is fetched only once from ES while it is in the cache
+    """
+    es = MagicMock()
+    es.get.return_value = es_doc('munin_poi', 'poi', 'osm:way:63178753')
+
+    first_place = fetch_es_place('osm:way:63178753', es, INDICES, 'poi')
+    second_place = fetch_es_place('osm:way:63178753', es, INDICES, 'poi')
+
+    assert es.get.call_count == 1
+    assert first_place == second_place
+
+    # The fields fetched depend on the verbosity
+    fetch_es_place('osm:way:63178753', es, INDICES, 'poi', SHORT)
+    assert es.get.call_count == 2
+
+
+def test_cache_emptied_after_reindex():
+    """
+    The cache is emptied when the indices behind the aliases change
+    """
+    es = MagicMock()
+    es.get.return_value = es_doc('munin_poi', 'poi', 'osm:way:63178753')
+    es.indices.get_alias.return_value = {'munin_poi_20181001': {'aliases': {'munin_poi': {}}}}
+    MimirCache._last_check = None
+
+    fetch_es_place('osm:way:63178753', es, INDICES, 'poi')
+    MimirCache._last_check = None
+    fetch_es_place('osm:way:63178753', es, INDICES, 'poi')
+    assert es.get.call_count == 1
+
+    es.indices.get_alias.return_value = {'munin_poi_20181015': {'aliases': {'munin_poi': {}}}}
+    MimirCache._last_check = None
+    fetch_es_place('osm:way:63178753', es, INDICES, 'poi')
+    assert es.get.call_count == 2
+
+
+def test_admin_source_filter():
+    """
+    The boundary of an admin is never fetched
+    """
+    source_filter = get_source_filter('admin', LONG)
+
+    assert 'boundary' not in source_filter['include']
+    assert 'boundary' in source_filter['exclude']
+    assert {'id', 'name', 'label', 'zone_type', 'zip_codes'} <= set(source_filter['include'])
+
+
+def test_poi_source_filter():
+    source_filter = get_source_filter('poi', SHORT)
+
+    assert {'id', 'coord', 'properties', 'administrative_regions.id'} <= set(source_filter['include'])
+    assert 'administrative_regions' not in source_filter['include']
@@ -0,0 +1,112 @@
+import json
+import os
+import time
+from unittest.mock import MagicMock, patch
+
+from app import settings
+from apistar import http
+from idunn.api import places
+from idunn.api.places import get_place
+from idunn.api.http_cache import get_place_digest
+from idunn.api.utils import LONG
+from idunn.blocks.base import replace_fields
+from idunn.places import POI
+from idunn.utils.index_names import IndexNames
+from idunn.utils.place_cache import PlaceCache
+from idunn.utils.mimir_cache import MimirCache
+
+"""
+    This module tests the ETag and Cache-Control headers of the places,
+    without any running elasticsearch
+"""
+
+INDICES = IndexNames({"admin": "munin_admin"}, id_prefixes={"admin": "admin"})
+ID = 'admin:osm:relation:123057'
+
+
+def mock_es(version=1):
+    filepath = os.path.join(os.path.dirname(__file__), 'fixtures', 'admin_goujounac.json')
+    with open(filepath, "r") as f:
+        source = json.load(f)
+    es = MagicMock()
+    es.get.return_value = {
+        '_index': 'munin_admin_20181001', '_type': 'admin', '_id': ID,
+        '_version': version, 'found': True, '_source': source
+    }
+    return es
+
+
+def read_fixture(filename):
+    filepath = os.path.join(os.path.dirname(__file__), 'fixtures', filename)
+    with open(filepath, "r") as f:
+        return json.load(f)
+
+
+def request(es, etag=None):
+    headers = http.Headers({'If-None-Match': etag} if etag else {})
+    return get_place(ID, es, INDICES, settings, headers, lang='fr')
+
+
+def test_place_cache_headers():
+    response = request(mock_es())
+
+    assert response.status_code == 200
+    assert response.headers['ETag'].startswith('W/"')
+    assert response.headers['Cache-Control'] == f"public, max-age={settings['HTTP_CACHE_MAX_AGE']}"
+
+
+def test_not_modified():
+    etag = request(mock_es()).headers['ETag']
+
+    # The place is found in the PlaceCache
+    with patch.object(places, 'load_place') as load_place:
+        response = request(mock_es(), etag)
+
+    assert response.status_code == 304
+    assert response.content == b''
+    assert response.headers['ETag'] == etag
+    assert response.headers['Cache-Control'] == f"public, max-age={settings['HTTP_CACHE_MAX_AGE']}"
+    load_place.assert_not_called()
+
+    # The place is built again
+    PlaceCache.clear()
+    assert request(mock_es(), etag).status_code == 304
+
+
+def test_modified_place():
+    etag = request(mock_es(version=1)).headers['ETag']
+    PlaceCache.clear()
+    MimirCache.clear()
+
+    response = request(mock_es(version=2), etag)
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_etag_revalidated_after_max_age():
+    """
+    The ETag does not expire: an unchanged place is revalidated
+    by the clients once its max-age is over
+    """
+    now = time.time()
+    etag = request(mock_es()).headers['ETag']
+    PlaceCache.clear()
+    MimirCache.clear()
+
+    max_age = int(settings['HTTP_CACHE_MAX_AGE'])
+    with patch('time.time', return_value=now + max_age + 1):
+        response = request(mock_es(), etag)
+
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+
+
+def test_etag_changed_by_opening_hours_transition():
+    place = POI.load_place(read_fixture('orsay_museum.json'), 'fr', settings, LONG)
+    digest = get_place_digest(place, 'munin_poi_20181001/1', ('osm:way:63178753',))
+
+    transition = place.blocks[0]['next_transition_datetime']
+    assert transition is not None
+    blocks = [dict(place.blocks[0], next_transition_datetime='2018-06-14T22:00:00+03:00')] + place.blocks[1:]
+    later_place = replace_fields(place, blocks=blocks)
+    assert get_place_digest(later_place, 'munin_poi_20181001/1', ('osm:way:63178753',)) != digest
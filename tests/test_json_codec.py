@@ -0,0 +1,35 @@
+import pytest
+from datetime import date
+
+from idunn.utils.json_codec import ElasticsearchSerializer, JsonCodec, get_available_backends
+from .utils import override_settings
+
+
+@pytest.fixture
+def reset_codec():
+    JsonCodec._backend = None
+    yield
+    JsonCodec._backend = None
+
+
+@pytest.mark.parametrize('backend', get_available_backends(), ids=lambda b: b.name)
+def test_es_serializer(backend):
+    serializer = ElasticsearchSerializer(backend)
+    doc = {'_id': 'osm:way:63178753', 'found': True, '_source': {'name': "Musée d'Orsay", 'coord': {'lon': 2.3265827716099623}}}
+
+    assert serializer.loads(serializer.dumps(doc)) == doc
+    assert serializer.loads(serializer.dumps(doc).encode('utf-8')) == doc
+
+    # The values unknown to the backend are serialized by the default ES serializer
+    assert serializer.loads(serializer.dumps({'day': date(2018, 10, 15)})) == {'day': '2018-10-15'}
+
+
+def test_unknown_backend(reset_codec):
+    with override_settings({'JSON_BACKEND': 'not_installed_json'}):
+        with pytest.raises(ValueError):
+            JsonCodec.get_backend()
+
+
+def test_auto_backend(reset_codec):
+    with override_settings({'JSON_BACKEND': 'auto'}):
+        assert JsonCodec.get_backend().name == get_available_backends()[0].name
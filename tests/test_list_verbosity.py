@@ -0,0 +1,52 @@
+import json
+import os
+import pytest
+from apistar.exceptions import BadRequest
+
+from app import settings
+from idunn.api.places import validate_verbosity, get_fields
+from idunn.api.utils import get_source_filter, LIST
+from idunn.places import POI
+from idunn.api.serializers import select_fields
+
+"""
+    This module tests the list verbosity, used by the map markers
+"""
+
+
+def read_fixture(filename):
+    filepath = os.path.join(os.path.dirname(__file__), 'fixtures', filename)
+    with open(filepath, "r") as f:
+        return json.load(f)
+
+
+def test_list_verbosity_valid():
+    validate_verbosity(LIST)
+    with pytest.raises(BadRequest) as exc_info:
+        validate_verbosity('lists')
+    assert exc_info.value.detail == {
+        "message": "verbosity lists does not belong to the set of possible verbosity values=['long', 'short', 'list']"
+    }
+
+
+def test_list_source_filter():
+    assert get_source_filter('poi', LIST)['include'] == ['coord', 'id', 'properties']
+    assert get_source_filter('admin', LIST)['include'] == ['coord', 'id', 'name', 'properties', 'zone_type']
+
+
+def test_list_poi():
+    place = POI.load_place(read_fixture('orsay_museum.json'), 'fr', settings, LIST)
+    poi = select_fields(place, get_fields(None, LIST))
+
+    assert poi['name'] == "Musée d'Orsay"
+    assert poi['class_name'] == 'museum'
+    assert poi['geometry']['coordinates'] == [2.3265827716099623, 48.859917803575875]
+    assert 'address' not in poi
+
+    opening_hours, = poi['blocks']
+    assert opening_hours == {'type': 'opening_hours', 'status': opening_hours['status']}
+    assert opening_hours['status'] in ('open', 'closed')
+
+    # The next transition is kept for the caches of the place
+    assert place.blocks[0]['seconds_before_next_transition'] > 0
+    assert place.get_cache_ttl(10 ** 7) == place.blocks[0]['seconds_before_next_transition']
@@ -0,0 +1,39 @@
+from freezegun import freeze_time
+
+from idunn.utils.lru_cache import LruCache
+
+
+def test_lru_eviction():
+    cache = LruCache('test', maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+
+    assert cache.get('a') == 1 # 'a' is now the most recently used entry
+    cache.set('c', 3)
+
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+    assert len(cache) == 2
+
+
+def test_ttl():
+    with freeze_time("2018-06-14 8:30:00") as frozen_time:
+        cache = LruCache('test', maxsize=10, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2, ttl=10)
+        cache.set('c', 3, ttl=3600) # capped by the ttl of the cache
+
+        frozen_time.tick(30)
+        assert cache.get('a') == 1
+        assert cache.get('b') is None
+
+        frozen_time.tick(31)
+        assert cache.get('a') is None
+        assert cache.get('c') is None
+
+
+def test_disabled():
+    cache = LruCache('test', maxsize=0, ttl=60)
+    cache.set('a', 1)
+    assert cache.get('a') is None
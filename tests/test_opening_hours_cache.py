@@ -0,0 +1,69 @@
+from datetime import datetime
+from unittest.mock import patch
+from freezegun import freeze_time
+from pytz import timezone
+
+from idunn.blocks.opening_hour import OpeningHourBlock
+from idunn.utils.opening_hours_cache import OpeningHoursCache, PARSE_ERROR
+
+"""
+    This module tests that the opening_hours fields are parsed once,
+    and that their schedules are shared by the POIs
+"""
+
+
+def get_block(opening_hours, lat=55.7483, lon=37.5881):
+    return OpeningHourBlock.from_es(
+        {
+            "coord": {"lat": lat, "lon": lon},
+            "properties": {"opening_hours": opening_hours},
+        },
+        lang='en'
+    )
+
+
+def test_schedule_shared():
+    schedule = OpeningHoursCache.get_schedule('Mo-Fr 09:00-18:00', 55.7483, 37.5881, 'Europe/Moscow')
+    assert OpeningHoursCache.get_schedule('Mo-Fr 09:00-18:00', 55.7, 37.6, 'Europe/Moscow') is schedule
+    assert OpeningHoursCache.get_schedule('Mo-Fr 09:00-19:00', 55.7483, 37.5881, 'Europe/Moscow') is not schedule
+
+
+def test_solar_schedule_shared_by_cell():
+    """
+    The schedules of the fields with solar hours are shared
+    by the POIs of a cell, with the center of the cell as location
+    """
+    schedule = OpeningHoursCache.get_schedule('Mo-Su sunrise-sunset', 55.7483, 37.5881, 'Europe/Moscow')
+    assert OpeningHoursCache.get_schedule('Mo-Su sunrise-sunset', 55.7421, 37.5812, 'Europe/Moscow') is schedule
+    assert OpeningHoursCache.get_schedule('Mo-Su sunrise-sunset', 55.7583, 37.5881, 'Europe/Moscow') is not schedule
+    assert round(schedule.parser.solar_hours.location.latitude, 3) == 55.745
+    assert round(schedule.parser.solar_hours.location.longitude, 3) == 37.585
+
+
+def test_parse_error_cached():
+    assert OpeningHoursCache.get_schedule('Mo-Fr 25:00-26:00 invalid', 55.7483, 37.5881, 'Europe/Moscow') is None
+    cache = OpeningHoursCache.get_cache()
+    assert cache.get(('Mo-Fr 25:00-26:00 invalid', 'Europe/Moscow', None)) is PARSE_ERROR
+    assert get_block('Mo-Fr 25:00-26:00 invalid') is None
+
+
+@freeze_time("2018-06-14 8:30:00", tz_offset=0)
+def test_blocks_with_shared_schedule():
+    first = get_block('Mo-Sa 10:00-22:00')
+    second = get_block('Mo-Sa 10:00-22:00', lat=55.75, lon=37.62)
+    assert first.status == second.status == 'open'
+    assert first.next_transition_datetime == second.next_transition_datetime == '2018-06-14T22:00:00+03:00'
+
+
+def test_days_rendered_once_a_week():
+    schedule = OpeningHoursCache.get_schedule('We-Mo 11:00-19:00', 55.7483, 37.5881, 'Europe/Moscow')
+    moscow = timezone('Europe/Moscow')
+    days = OpeningHourBlock.get_days(schedule, moscow.localize(datetime(2018, 6, 15, 21)))
+    with patch.object(schedule, 'get_periods', side_effect=AssertionError('rendered again')):
+        assert OpeningHourBlock.get_days(schedule, moscow.localize(datetime(2018, 6, 17, 9))) == days
+
+    next_days = OpeningHourBlock.get_days(schedule, moscow.localize(datetime(2018, 6, 18, 9)))
+    assert [d['local_date'] for d in next_days] == [
+        '2018-06-18', '2018-06-19', '2018-06-20', '2018-06-21', '2018-06-22', '2018-06-23', '2018-06-24'
+    ]
+    assert [d['status'] for d in next_days] == [d['status'] for d in days]
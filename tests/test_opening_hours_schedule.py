@@ -0,0 +1,73 @@
+import random
+import datetime
+import pytest
+import humanized_opening_hours as hoh
+from humanized_opening_hours.exceptions import HOHError
+
+from idunn.utils.opening_hours_schedule import get_schedule, WeeklySchedule, ParserSchedule
+
+"""
+    This module tests that the compiled schedules give
+    the same results as humanized_opening_hours
+"""
+
+COMPILED_FIELDS = [
+    "Mo-Sa 10:00-22:00; Su 10:00-14:00, 18:00-22:00",
+    "Mo-Su 10:00-22:00",
+    "Mo-Su 09:00-00:00",
+    "We-Mo 11:00-19:00",
+    "Mo,We-Fr 08:30-12:00,13:30-18:30",
+    "10:00-20:00; Su 12:00-14:00",
+    "Su 12:00-14:00; 10:00-20:00",
+    "Mo-Fr 09:00-18:00; Mo-Fr 10:00-12:00",
+    "Mo-Fr 00:00-24:00",
+    "Sa 18:00-24:00; Su 00:00-03:00",
+    "Su 20:00-24:00; Mo 00:00-02:00, 10:00-12:00",
+    "Mo-Su 00:00-24:00",
+    "24/7",
+]
+
+PARSER_FIELDS = [
+    "Mo-Su 12:00-14:30; Mo-Su,PH 19:00-22:30",
+    "Jan-Feb 10:00-20:00",
+    "Mo-Su 09:00-02:00",
+    "Mo-Fr 10:00-12:00; Sa off",
+    "Mo 14:00-16:00,10:00-12:00",
+    "sunrise-sunset",
+]
+
+
+def get_datetimes(seed):
+    rand = random.Random(seed)
+    start = datetime.datetime(2018, 6, 11)
+    datetimes = [start + datetime.timedelta(minutes=m) for m in range(0, 7 * 24 * 60, 30)]
+    datetimes += [start + datetime.timedelta(seconds=rand.randrange(7 * 24 * 3600)) for _ in range(200)]
+    return datetimes
+
+
+def get_next_change(schedule, dt):
+    try:
+        return schedule.next_change(dt)
+    except HOHError as e:
+        return type(e)
+
+
+@pytest.mark.parametrize('field', COMPILED_FIELDS)
+def test_compiled_schedule(field):
+    oh = hoh.OHParser(field)
+    schedule = get_schedule(oh)
+    assert isinstance(schedule, WeeklySchedule)
+    assert schedule.field == oh.field
+
+    for dt in get_datetimes(field):
+        assert schedule.is_open(dt) == oh.is_open(dt), dt
+        assert get_next_change(schedule, dt) == get_next_change(ParserSchedule(oh), dt), dt
+
+    for days in range(7):
+        day = datetime.date(2018, 6, 11) + datetime.timedelta(days=days)
+        assert schedule.get_periods(day) == oh.get_day(day).opening_periods(), day
+
+
+@pytest.mark.parametrize('field', PARSER_FIELDS)
+def test_parser_schedule(field):
+    assert isinstance(get_schedule(hoh.OHParser(field)), ParserSchedule)
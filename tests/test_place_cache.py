@@ -0,0 +1,64 @@
+from freezegun import freeze_time
+
+from idunn.places import POI
+from idunn.blocks import OpeningHourBlock, PhoneBlock
+from idunn.utils.place_cache import PlaceCache
+
+
+def build_poi(seconds_before_next_transition):
+    return POI(
+        id='osm:way:63178753',
+        name="Musée d'Orsay",
+        local_name="Musée d'Orsay",
+        class_name='museum',
+        subclass_name='museum',
+        geometry=None,
+        address=None,
+        blocks=[
+            OpeningHourBlock(
+                status='open',
+                next_transition_datetime='2018-06-14T21:45:00+02:00',
+                seconds_before_next_transition=seconds_before_next_transition,
+                is_24_7=False,
+                raw='Tu-Su 09:30-18:00; Th 09:30-21:45',
+                days=[]
+            ),
+            PhoneBlock(
+                url='tel:+33140494814',
+                international_format='+33140494814',
+                local_format='+33140494814'
+            )
+        ]
+    )
+
+
+def test_cache_until_next_transition():
+    """
+    A place is cached until the next transition of its opening hours,
+    and the countdown to this transition is kept up to date
+    """
+    key = PlaceCache.get_key('osm:way:63178753', None, 'fr', 'long')
+
+    with freeze_time("2018-06-14 19:44:00") as frozen_time:
+        PlaceCache.set(key, build_poi(seconds_before_next_transition=60))
+
+        frozen_time.tick(20)
+        place = PlaceCache.get(key)
+        assert place['blocks'][0]['seconds_before_next_transition'] == 40
+        assert place['blocks'][1]['type'] == 'phone'
+
+        frozen_time.tick(41)
+        assert PlaceCache.get(key) is None
+
+
+def test_cache_max_ttl():
+    key = PlaceCache.get_key('osm:way:63178753', None, 'fr', 'long')
+
+    with freeze_time("2018-06-14 8:30:00") as frozen_time:
+        PlaceCache.set(key, build_poi(seconds_before_next_transition=40500))
+
+        frozen_time.tick(30)
+        assert PlaceCache.get(key) is not None
+
+        frozen_time.tick(31)
+        assert PlaceCache.get(key) is None # PLACE_CACHE_MAX_TTL has expired
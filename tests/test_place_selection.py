@@ -0,0 +1,71 @@
+import json
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app import settings
+from apistar import http
+from apistar.exceptions import BadRequest
+from idunn.api.places import get_place
+from idunn.blocks import WikipediaBlock
+from idunn.utils.index_names import IndexNames
+
+"""
+    This module tests the selection of the blocks and fields of a place,
+    without any running elasticsearch
+"""
+
+INDICES = IndexNames({"poi": "munin_poi"}, id_prefixes={"pois": "poi"})
+ID = 'pois:osm:node:5286293722'
+
+
+def mock_es():
+    es = MagicMock()
+    es.get.return_value = {
+        '_index': 'munin_poi', '_type': 'poi', '_id': ID, '_version': 1, 'found': True,
+        '_source': {
+            'id': ID,
+            'coord': {'lon': 2.3265, 'lat': 48.8600},
+            'properties': [
+                {'key': 'name', 'value': "Musée d'Orsay"},
+                {'key': 'phone', 'value': '+33 1 40 49 48 14'},
+                {'key': 'wikipedia', 'value': "fr:Musée d'Orsay"},
+            ],
+        }
+    }
+    return es
+
+
+def request(**params):
+    response = get_place(ID, mock_es(), INDICES, settings, http.Headers(), lang='fr', **params)
+    return json.loads(response.content.decode('utf-8'))
+
+
+def test_selected_blocks():
+    with patch.object(WikipediaBlock, 'from_es') as wikipedia_from_es:
+        place = request(blocks='phone')
+
+    assert [b['type'] for b in place['blocks']] == ['phone']
+    wikipedia_from_es.assert_not_called()
+
+
+def test_selected_fields():
+    with patch.object(WikipediaBlock, 'from_es') as wikipedia_from_es:
+        place = request(fields='name,geometry')
+
+    assert place == {
+        'type': 'poi',
+        'id': ID,
+        'name': "Musée d'Orsay",
+        'geometry': {'type': 'Point', 'coordinates': [2.3265, 48.86], 'center': [2.3265, 48.86]},
+    }
+    wikipedia_from_es.assert_not_called()
+
+
+@pytest.mark.parametrize('params', [
+    {'blocks': 'unknown'},
+    {'blocks': 'wikipedia'}, # only the top-level blocks can be selected
+    {'fields': 'name,unknown'},
+])
+def test_invalid_selection(params):
+    with pytest.raises(BadRequest):
+        request(**params)
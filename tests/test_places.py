@@ -365,4 +365,58 @@ def test_wrong_verbosity():
         url=f'http://localhost/v1/places/osm:way:63178753?lang=fr&verbosity=shoooooort',
     )
     assert response.status_code == 400
-    assert response._content == b'{"message":"verbosity shoooooort does not belong to the set of possible verbosity values=[\'long\', \'short\']"}'
+    assert response._content == b'{"message":"verbosity shoooooort does not belong to the set of possible verbosity values=[\'long\', \'short\', \'list\']"}'
+
+def test_list_verbosity_query():
+    client = TestClient(app)
+
+    response = client.get(
+        url=f'http://localhost/v1/places/osm:way:63178753?lang=fr&verbosity=list',
+    )
+    assert response.status_code == 200
+
+    resp = response.json()
+    assert resp["id"] == "osm:way:63178753"
+    assert [b["type"] for b in resp["blocks"]] == ["opening_hours"]
+
+def test_batch_query():
+    client = TestClient(app)
+    ids = ','.join([
+        'admin:osm:relation:123057',
+        '35460343',
+        urllib.parse.quote_plus("addr:5.108632;48.810273"),
+        'osm:way:63178753',
+        'an_unknown_place_id',
+    ])
+
+    response = client.get(
+        url=f'http://localhost/v1/places?ids={ids}&lang=fr&verbosity=short',
+    )
+
+    assert response.status_code == 200
+    assert response.headers.get('Access-Control-Allow-Origin') == '*'
+
+    resp = response.json()
+
+    assert [p['id'] for p in resp['places']] == [
+        'admin:osm:relation:123057',
+        '35460343',
+        'addr:5.108632;48.810273',
+        'osm:way:63178753',
+    ]
+    assert [p['type'] for p in resp['places']] == ['admin', 'street', 'address', 'poi']
+    assert resp['places'][3]['name'] == "Musée d'Orsay"
+    assert len(resp['places'][3]['blocks']) == 1 # only the opening hours in short verbosity
+    assert resp['errors'] == [
+        {'id': 'an_unknown_place_id', 'message': 'place an_unknown_place_id not found with type=None'}
+    ]
+
+def test_batch_query_too_many_ids():
+    client = TestClient(app)
+    ids = ','.join(f'osm:node:{i}' for i in range(100))
+
+    response = client.get(
+        url=f'http://localhost/v1/places?ids={ids}',
+    )
+    assert response.status_code == 400
+    assert response.json() == {"message": "the number of ids must be between 1 and 50"}
@@ -0,0 +1,43 @@
+import copy
+
+from idunn.api.utils import LONG
+from idunn.places import POI
+from idunn.utils.properties import PropertiesView
+
+"""
+    This module tests that the POIs are built from their raw
+    properties without modifying the ES document
+"""
+
+RAW_POI = {
+    "id": "osm:node:5286293722",
+    "properties": [
+        {"key": "name", "value": "Musée d'Orsay"},
+        {"key": "name:en", "value": "Orsay Museum"},
+        {"key": "poi_class", "value": "museum"},
+        {"key": "phone", "value": "+33 1 40 49 48 14"},
+        {"key": "wheelchair", "value": "yes"},
+    ],
+    "coord": {"lon": 2.3265, "lat": 48.8600},
+}
+
+
+def test_raw_poi_not_modified():
+    raw_poi = copy.deepcopy(RAW_POI)
+
+    poi = POI.load_place(raw_poi, 'en', None, LONG)
+
+    assert raw_poi == RAW_POI
+    assert poi.name == "Orsay Museum"
+    assert poi.local_name == "Musée d'Orsay"
+    assert poi.class_name == "museum"
+    assert {b['type'] for b in poi.blocks} == {'phone', 'information'}
+
+
+def test_properties_view_is_read_only():
+    view = PropertiesView(RAW_POI['properties'])
+
+    assert view['phone'] == "+33 1 40 49 48 14"
+    assert 'wifi' not in view
+    assert not hasattr(view, '__setitem__')
+    assert view == {p['key']: p['value'] for p in RAW_POI['properties']}
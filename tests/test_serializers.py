@@ -0,0 +1,61 @@
+import json
+import os
+import pytest
+from unittest.mock import patch
+from freezegun import freeze_time
+from apistar.http import JSONResponse
+
+from app import settings
+from idunn.api.utils import LONG, SHORT
+from idunn.api.serializers import SerializedJSONResponse
+from idunn.blocks import WikipediaBlock
+from idunn.blocks.base import TypeValidation
+from idunn.places import POI, Admin, Street, Address
+
+"""
+    This module tests that the compiled serializers
+    render the places as apistar does
+"""
+
+
+def read_fixture(filename):
+    filepath = os.path.join(os.path.dirname(__file__), 'fixtures', filename)
+    with open(filepath, "r") as f:
+        return json.load(f)
+
+
+@pytest.fixture(params=[True, False], ids=['validated', 'trusted'])
+def type_validation(request):
+    TypeValidation._enabled = request.param
+    yield
+    TypeValidation._enabled = True
+
+
+@freeze_time("2018-06-14 8:30:00", tz_offset=2)
+@pytest.mark.parametrize('place_class, fixture', [
+    (POI, 'orsay_museum.json'),
+    (POI, 'fake_all_blocks.json'),
+    (POI, 'louvre_museum.json'),
+    (Admin, 'admin_goujounac.json'),
+    (Street, 'street_birnenweg.json'),
+    (Address, 'address_du_moulin.json'),
+])
+@pytest.mark.parametrize('verbosity', [LONG, SHORT])
+def test_serialized_place(place_class, fixture, verbosity, type_validation):
+    es_place = read_fixture(fixture)
+    with patch.object(WikipediaBlock, 'from_es', return_value=None):
+        place = place_class.load_place(es_place, 'fr', settings, verbosity)
+
+    response = SerializedJSONResponse(place)
+
+    assert response.headers['Content-Type'] == 'application/json'
+    assert json.loads(response.content.decode('utf-8')) == json.loads(JSONResponse(place).content.decode('utf-8'))
+
+
+def test_serialized_places_list():
+    place = Admin.load_place(read_fixture('admin_goujounac.json'), 'fr', settings, LONG)
+    content = {"places": [place], "errors": [{"id": "admin:unknown", "message": "not found"}]}
+
+    response = SerializedJSONResponse(content)
+
+    assert json.loads(response.content.decode('utf-8')) == json.loads(JSONResponse(content).content.decode('utf-8'))
@@ -0,0 +1,114 @@
+import random
+import pytest
+from tzwhere import tzwhere
+
+from idunn.utils.timezone_index import build_index, TimezoneIndex, TimezoneFinder
+from idunn.utils.timezone_cache import TimezoneCache, BORDER_CELL
+from .utils import override_settings
+
+# Around the Alps: many borders, and zones with several polygons
+BOUNDS = (44, 4, 50, 14)
+
+
+@pytest.fixture(scope='module')
+def index_path(tmpdir_factory):
+    path = str(tmpdir_factory.mktemp('timezones').join('timezones.idx'))
+    build_index(path, subdivisions=4, bounds=BOUNDS)
+    return path
+
+
+@pytest.fixture(scope='module')
+def tz():
+    return tzwhere.tzwhere(forceTZ=True)
+
+
+def test_same_zones_as_tzwhere(index_path, tz):
+    index = TimezoneIndex(index_path)
+    min_lat, min_lon, max_lat, max_lon = BOUNDS
+    rand = random.Random(0)
+    points = [
+        (rand.uniform(min_lat, max_lat), rand.uniform(min_lon, max_lon))
+        for _ in range(2000)
+    ]
+    # Points on the borders, along the Rhine and in the lake of Geneva
+    points += [(47.5596, 7.5886), (47.6779, 8.6148), (46.4531, 6.5250), (48.5734, 7.7521)]
+    for lat, lon in points:
+        assert index.tz_name_at(lat, lon) == tz.tzNameAt(lat, lon, forceTZ=True), (lat, lon)
+
+
+def test_out_of_the_index(index_path):
+    index = TimezoneIndex(index_path)
+    assert index.tz_name_at(40.7, -74) is None
+    assert index.tz_name_at(91, 0) is None
+
+
+def test_invalid_index(tmpdir):
+    path = tmpdir.join('timezones.idx')
+    path.write(b'not an index')
+    with pytest.raises(ValueError):
+        TimezoneIndex(str(path))
+
+
+def test_finder_reads_the_index(index_path):
+    with override_settings({'TIMEZONE_INDEX_PATH': index_path}):
+        TimezoneFinder.clear()
+        try:
+            assert TimezoneFinder.tz_name_at(48.85, 2.35) is None # out of the bounds of this index
+            assert TimezoneFinder.tz_name_at(47.37, 8.54) == 'Europe/Zurich'
+        finally:
+            TimezoneFinder.clear()
+
+
+def test_zone_in_box(index_path):
+    index = TimezoneIndex(index_path)
+    assert index.locate(49.5, 11.5) == ('Europe/Berlin', None)
+    # Basel, on the borders of Switzerland, France and Germany
+    tzname, mixed_cell = index.locate(47.5596, 7.5886)
+    assert tzname is None and mixed_cell is not None
+    assert index.get_zone_in_box(mixed_cell, 47.55, 7.63, 47.56, 7.64) is None # across the border
+    assert index.get_zone_in_box(mixed_cell, 47.54, 7.60, 47.55, 7.61) == 'Europe/Zurich'
+
+
+@pytest.fixture
+def timezone_cache(index_path):
+    overrides = {'TIMEZONE_INDEX_PATH': index_path, 'TIMEZONE_CACHE_SIZE': 100, 'TIMEZONE_CACHE_GRID': 0.01}
+    with override_settings(overrides):
+        TimezoneFinder.clear()
+        TimezoneCache._cache = None
+        try:
+            yield TimezoneCache.get_cache()
+        finally:
+            TimezoneFinder.clear()
+            TimezoneCache._cache = None
+
+
+def test_timezone_cache(timezone_cache, tz):
+    """
+    The timezones of the POIs in the cells of the index on a border are
+    cached by cell of a finer grid, and looked up in the cells on a border
+    """
+    assert TimezoneCache.get_timezone(49.5, 11.5).zone == 'Europe/Berlin'
+    assert timezone_cache.keys() == []
+
+    points = [(47.5441, 7.6051), (47.5449, 7.6059), (47.5555, 7.6355), (47.5655, 7.6455)]
+    for lat, lon in points:
+        assert TimezoneCache.get_timezone(lat, lon).zone == tz.tzNameAt(lat, lon, forceTZ=True)
+    cells = {key[1:]: timezone_cache.get(key) for key in timezone_cache.keys()}
+    assert cells == {(4754, 760): 'Europe/Zurich', (4755, 763): BORDER_CELL, (4756, 764): BORDER_CELL}
+
+
+def test_missing_index(tmpdir, caplog):
+    path = str(tmpdir.join('missing.idx'))
+    with override_settings({'TIMEZONE_INDEX_PATH': path}):
+        TimezoneFinder.clear()
+        try:
+            assert TimezoneFinder.get_index() is None
+        finally:
+            TimezoneFinder.clear()
+
+    record, = [r for r in caplog.records if r.name == 'idunn.utils.timezone_index']
+    assert record.getMessage() == (
+        f"The timezone index {path} is missing, falling back to tzwhere "
+        "(build it with 'python -m idunn.utils.timezone_index build')"
+    )
+    assert record.exc_info is None
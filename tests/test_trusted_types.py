@@ -0,0 +1,64 @@
+import json
+import os
+import pytest
+from unittest.mock import patch
+from freezegun import freeze_time
+from apistar.http import JSONResponse
+from apistar.exceptions import ValidationError
+
+from app import settings
+from idunn.api.utils import LONG
+from idunn.blocks import WikipediaBlock
+from idunn.blocks.base import TypeValidation
+from idunn.places import POI, Admin
+
+"""
+    This module tests that the places built without validation
+    are rendered as the validated ones
+"""
+
+
+def read_fixture(filename):
+    filepath = os.path.join(os.path.dirname(__file__), 'fixtures', filename)
+    with open(filepath, "r") as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def trusted_types():
+    TypeValidation._enabled = False
+    yield
+    TypeValidation._enabled = True
+
+
+def render(place):
+    return json.loads(JSONResponse(place).content.decode('utf-8'))
+
+
+@freeze_time("2018-06-14 8:30:00", tz_offset=2)
+@pytest.mark.parametrize('place_class, fixture', [
+    (POI, 'orsay_museum.json'),
+    (POI, 'fake_all_blocks.json'),
+    (Admin, 'admin_goujounac.json'),
+])
+def test_trusted_place(place_class, fixture):
+    es_place = read_fixture(fixture)
+
+    with patch.object(WikipediaBlock, 'from_es', return_value=None):
+        validated_place = place_class.load_place(es_place, 'fr', settings, LONG)
+
+        TypeValidation._enabled = False
+        try:
+            trusted_place = place_class.load_place(es_place, 'fr', settings, LONG)
+        finally:
+            TypeValidation._enabled = True
+
+    assert render(trusted_place) == render(validated_place)
+
+
+def test_trusted_missing_field(trusted_types):
+    """
+    A missing required field is still an error
+    """
+    with pytest.raises(ValidationError):
+        POI(id='osm:way:63178753')